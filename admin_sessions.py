@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from datetime import datetime
+
+from database import AsyncDatabase
+
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = 600000
+
+
+def hash_password(password, salt=None, iterations=PASSWORD_HASH_ITERATIONS) -> str:
+    """Salted hash for config.ADMIN_PASSWORD_HASH, as "pbkdf2_sha256$iterations$salt$hash":
+
+    python -c "from admin_sessions import hash_password; print(hash_password('...'))"
+    """
+    salt = salt or os.urandom(16).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${salt}${digest}"
+
+
+def verify_password(password, password_hash) -> bool:
+    try:
+        algorithm, iterations, salt, digest = password_hash.split("$")
+    except ValueError:
+        logging.error("Malformed admin password hash")
+        return False
+    if algorithm != PASSWORD_HASH_ALGORITHM:
+        logging.error(f"Unsupported admin password hash algorithm: {algorithm}")
+        return False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations)).hex()
+    return hmac.compare_digest(candidate, digest)
+
+
+class AdminSessionManager:
+    """In-memory admin session table, written through to admin_sessions.
+
+    `sessions` maps an admin's user id to the expiry time of their login,
+    so `is_admin` is a dict lookup and a clock read. Logins and logouts
+    update the map and then the database, and `load` restores unexpired
+    sessions on startup. A session ends ttl seconds after login.
+    Passwords are checked against a salted PBKDF2 hash, off the event loop.
+    """
+
+    def __init__(self, db: AsyncDatabase, admin_ids, password_hash, ttl=12 * 3600):
+        self.db = db
+        self.admin_ids = frozenset(admin_ids)
+        self.password_hash = password_hash
+        self.ttl = ttl
+        # user id -> expiry (epoch seconds)
+        self.sessions = {}
+
+    async def load(self):
+        now = time.time()
+        for user_id, expires_at in await self.db.get_admin_sessions(datetime.fromtimestamp(now)):
+            expires = datetime.fromisoformat(str(expires_at)).timestamp()
+            if user_id in self.admin_ids and expires > now:
+                self.sessions[user_id] = expires
+        logging.info(f"Restored {len(self.sessions)} admin sessions.")
+
+    def is_admin(self, user_id) -> bool:
+        expires = self.sessions.get(user_id)
+        if expires is None:
+            return False
+        if expires <= time.time():
+            # The stored row has expired too; load() skips it
+            del self.sessions[user_id]
+            return False
+        return True
+
+    async def check_password(self, password) -> bool:
+        return await asyncio.to_thread(verify_password, password, self.password_hash)
+
+    async def login(self, user_id):
+        expires = time.time() + self.ttl
+        self.sessions[user_id] = expires
+        await self.db.set_admin_session(user_id, True, datetime.fromtimestamp(expires))
+
+    async def logout(self, user_id):
+        self.sessions.pop(user_id, None)
+        await self.db.set_admin_session(user_id, False)
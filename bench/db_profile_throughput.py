@@ -0,0 +1,104 @@
+"""Insert/read throughput of the SQLite performance profile.
+
+Runs the same workload through AsyncDatabase twice, on a fresh database
+each time: once with SQLite's defaults (rollback journal,
+synchronous=FULL, 2 MB page cache) and once with config.DB_PROFILE:
+
+  insert     awaited add_feedback calls, one commit each, one after another
+  insert/c   the same, --concurrency calls in flight at once
+  log batch  add_messages in batches of MESSAGE_LOG_BATCH_SIZE rows
+  read       user rows read by primary key, bypassing the user cache
+  page       first page of the paged feedback admin list
+
+    python bench/db_profile_throughput.py --inserts 5000
+
+Runs in a temporary directory, so bot_data.db is not touched.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def timed(label, count, coro, results):
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    results[label] = count / elapsed
+
+
+async def bench(name, profile, args):
+    from config import MESSAGE_LOG_BATCH_SIZE
+    from database import AsyncDatabase
+
+    adb = AsyncDatabase(f"{name}.db", profile=profile)
+    db = adb.db
+    await adb.run(db.upsert_users, [
+        (user_id, f"user{user_id}", f"User{user_id}", None, 0, "uz") for user_id in range(1, args.users + 1)
+    ])
+    rng = random.Random(1)
+    results = {}
+
+    async def inserts():
+        for i in range(args.inserts):
+            await adb.add_feedback(rng.randint(1, args.users), f"fikr {i}")
+
+    async def concurrent_inserts():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with semaphore:
+                await adb.add_feedback(rng.randint(1, args.users), f"fikr {i}")
+        await asyncio.gather(*(one(i) for i in range(args.inserts)))
+
+    async def log_batches():
+        rows = [(rng.randint(1, args.users), f"xabar {i}", "text", None) for i in range(args.messages)]
+        for start in range(0, len(rows), MESSAGE_LOG_BATCH_SIZE):
+            await adb.run(db.add_messages, rows[start:start + MESSAGE_LOG_BATCH_SIZE])
+
+    async def reads():
+        for _ in range(args.reads):
+            await adb.run(db._load_user, rng.randint(1, args.users))
+
+    async def pages():
+        for _ in range(args.reads // 10):
+            await adb.get_page('feedback', None, 'next', 10)
+
+    await timed("insert", args.inserts, inserts(), results)
+    await timed("insert/c", args.inserts, concurrent_inserts(), results)
+    await timed("log batch", args.messages, log_batches(), results)
+    await timed("read", args.reads, reads(), results)
+    await timed("page", args.reads // 10, pages(), results)
+    await adb.close()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--inserts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--reads", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    os.chdir(tempfile.mkdtemp(prefix="bench-profile-"))
+    from config import DB_PROFILE
+
+    runs = {name: asyncio.run(bench(name, profile, args)) for name, profile in (("default", {}), ("profile", DB_PROFILE))}
+    print(f"users={args.users} inserts={args.inserts} messages={args.messages} reads={args.reads}  (operations/s)")
+    print(f"  {'':<10}" + "".join(f"{name:>12}" for name in runs))
+    for label in runs["default"]:
+        print(f"  {label:<10}" + "".join(f"{results[label]:12.0f}" for results in runs.values()))
+
+
+if __name__ == "__main__":
+    main_cli()
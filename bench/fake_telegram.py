@@ -0,0 +1,176 @@
+"""Test doubles for the benchmarks in this directory.
+
+FakeSession answers Bot API calls in-process, without any network I/O.
+FakeBotAPIServer is a local aiohttp server speaking enough of the Bot API
+(sendMessage, getUpdates, setWebhook, ...) to drive the real
+AiohttpSession. It can enforce a global flood limit the way Telegram
+does, by answering 429 with retry_after.
+"""
+import asyncio
+import collections
+import datetime
+import itertools
+import time
+
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import CopyMessage, SendMediaGroup
+from aiogram.types import Chat, Message, MessageId, Update
+from aiohttp import web
+
+_message_ids = itertools.count(1)
+_update_ids = itertools.count(1)
+
+
+def make_update(user_id, text, language_code="uz") -> dict:
+    """Bot API JSON of a private text message update."""
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}",
+                     "username": f"user{user_id}", "language_code": language_code},
+            "text": text,
+        },
+    }
+
+
+def sent_message(chat_id, text=None) -> dict:
+    return {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "text": text,
+    }
+
+
+class FakeSession(BaseSession):
+    """Bot session answering every call in-process; `sent` counts the calls per method."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = collections.Counter()
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def make_request(self, bot, method, timeout=None):
+        self.sent[type(method).__name__] += 1
+        chat_id = getattr(method, "chat_id", 0)
+        chat = Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private")
+        if isinstance(method, CopyMessage):
+            return MessageId(message_id=next(_message_ids))
+        if isinstance(method, SendMediaGroup):
+            return [Message(message_id=next(_message_ids), date=datetime.datetime.now(), chat=chat)]
+        if method.__returning__ is Message:
+            return Message(message_id=next(_message_ids), date=datetime.datetime.now(), chat=chat,
+                           text=getattr(method, "text", None))
+        return True
+
+
+class FakeBotAPIServer:
+    """Local Bot API server.
+
+    With `rate` set, more than `rate` sendMessage calls within one second
+    are answered with 429 and retry_after=`retry_after`. `latency` is
+    added to every sendMessage. Sent messages are recorded in `sent` as
+    (monotonic time, chat_id, text); `on_send` is called for each of them.
+    Updates put into `updates` are served by getUpdates.
+    """
+
+    def __init__(self, rate=None, retry_after=1, latency=0.0, on_send=None):
+        self.rate = rate
+        self.retry_after = retry_after
+        self.latency = latency
+        self.on_send = on_send
+        self.sent = []
+        self.flood_waits = 0
+        self.updates = asyncio.Queue()
+        self._window = collections.deque()
+        self._runner = None
+        self.url = None
+
+    def api(self) -> TelegramAPIServer:
+        return TelegramAPIServer.from_base(self.url)
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def close(self):
+        await self._runner.cleanup()
+
+    @staticmethod
+    def ok(result):
+        return web.json_response({"ok": True, "result": result})
+
+    def _flooded(self):
+        if self.rate is None:
+            return False
+        now = time.monotonic()
+        while self._window and self._window[0] <= now - 1:
+            self._window.popleft()
+        if len(self._window) >= self.rate:
+            return True
+        self._window.append(now)
+        return False
+
+    async def handle(self, request: web.Request):
+        method = request.match_info["method"].lower()
+        data = dict(await request.post())
+
+        if method == "sendmessage":
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self._flooded():
+                self.flood_waits += 1
+                return web.json_response({
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+            chat_id = int(data["chat_id"])
+            self.sent.append((time.monotonic(), chat_id, data.get("text")))
+            if self.on_send is not None:
+                self.on_send(chat_id, data.get("text"))
+            return self.ok(sent_message(chat_id, data.get("text")))
+
+        if method == "getupdates":
+            timeout = int(data.get("timeout") or 0)
+            updates = []
+            try:
+                updates.append(await asyncio.wait_for(self.updates.get(), timeout or 0.01))
+            except asyncio.TimeoutError:
+                return self.ok([])
+            while not self.updates.empty():
+                updates.append(self.updates.get_nowait())
+            return self.ok(updates)
+
+        if method == "getme":
+            return self.ok({"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"})
+
+        # setWebhook, deleteWebhook, answerCallbackQuery, editMessageText, ...
+        return self.ok(True)
+
+
+def parse_update(data: dict) -> Update:
+    return Update.model_validate(data)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
@@ -0,0 +1,102 @@
+"""Handler latency under concurrent simulated updates.
+
+Feeds N updates from N different users into the real dispatcher of
+main.py at once and reports per-update latency and the worst event loop
+stall. Bot API calls are answered in-process (FakeSession), so only the
+handlers and the database are measured.
+
+    python bench/handler_latency.py --updates 1000
+
+"blocking" runs every database call inline on the event loop thread,
+with one commit per logged message, the way the bot worked before
+AsyncDatabase. "async" is the current code. Runs in a temporary
+directory, so bot_data.db is not touched.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_telegram import FakeSession, make_update, parse_update, percentile  # noqa: E402
+
+
+def make_blocking(adb):
+    """Run every call of an AsyncDatabase inline on the event loop (the pre-AsyncDatabase behaviour)."""
+    async def run(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    async def add_message(user_id, message_text, message_type, file_id=None):
+        return adb.db.add_message(user_id, message_text, message_type, file_id)
+
+    adb.run = run
+    adb.add_message = add_message
+
+
+async def monitor_loop(stop: asyncio.Event, stalls: list, interval=0.001):
+    """Record how late a 1 ms sleep wakes up, i.e. how long the loop was blocked."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def bench(mode, updates, synchronous):
+    import main
+
+    main.bot.session = FakeSession()
+    main.db.db.conn.execute(f"PRAGMA synchronous = {synchronous}")
+    if mode == "blocking":
+        make_blocking(main.db)
+
+    main.setup_dispatcher()
+    dp = main.dp
+
+    async def feed(update):
+        started = time.perf_counter()
+        await dp.feed_update(main.bot, update)
+        return time.perf_counter() - started
+
+    results = {}
+    for wave, text in (("/start", "/start"), ("stats button", "Statistika 📊")):
+        batch = [parse_update(make_update(100000 + i, text)) for i in range(updates)]
+        stop, stalls = asyncio.Event(), []
+        monitor = asyncio.create_task(monitor_loop(stop, stalls))
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(feed(update) for update in batch))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+        results[wave] = (latencies, elapsed, max(stalls, default=0.0))
+
+    await main.db.close()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--mode", choices=("blocking", "async"), default="async")
+    parser.add_argument("--synchronous", default="FULL",
+                        help="PRAGMA synchronous for the run; FULL fsyncs every commit")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench-latency-"))
+    results = asyncio.run(bench(args.mode, args.updates, args.synchronous))
+    print(f"mode={args.mode} updates={args.updates} synchronous={args.synchronous}")
+    for wave, (latencies, elapsed, stall) in results.items():
+        print(
+            f"  {wave:<13} total {elapsed:6.2f}s  "
+            f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  "
+            f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  "
+            f"max loop stall {stall * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,115 @@
+"""Per-user message counts: per-user COUNT(*) vs index vs maintained counters.
+
+Builds a temporary database with --users users and --messages messages,
+then times the ways the admin user list can get every user's message
+count:
+
+  count/no-index   one SELECT COUNT(*) per user with no index on user_id
+                   (the original show_all_users_admin loop), sampled and
+                   extrapolated to all users
+  count/index      the same loop with messages(user_id, timestamp) indexed
+  group-by         one aggregated GROUP BY user_id over messages
+  counters         users LEFT JOIN user_message_counts, maintained on write
+  counter lookup   Database.get_user_message_count for a single user
+
+    python bench/message_counts.py --users 100000 --messages 10000000
+
+Loading 10M rows takes a minute or two and about 600 MB of disk.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def load(conn, users, messages, chunk=200000):
+    conn.executemany(
+        "INSERT INTO users (telegram_id, first_name) VALUES (?, ?)",
+        ((user_id, f"User{user_id}") for user_id in range(1, users + 1))
+    )
+    rng = random.Random(42)
+    for start in range(0, messages, chunk):
+        conn.executemany(
+            "INSERT INTO messages (user_id, message_text, message_type) VALUES (?, 'bench', 'text')",
+            ((rng.randint(1, users),) for _ in range(min(chunk, messages - start)))
+        )
+    conn.execute("""
+        INSERT INTO user_message_counts (user_id, message_count)
+        SELECT user_id, COUNT(*) FROM messages GROUP BY user_id
+    """)
+    conn.commit()
+
+
+def per_user_counts(conn, user_ids):
+    for user_id in user_ids:
+        conn.execute("SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)).fetchone()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=10000000)
+    parser.add_argument("--no-index-sample", type=int, default=5, help="users timed without the index")
+    parser.add_argument("--index-sample", type=int, default=2000, help="users timed with the index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    os.chdir(tempfile.mkdtemp(prefix="bench-counts-"))
+    from database import Database
+
+    db = Database("bench.db")
+    conn = db.conn
+    # Bulk load without the search index triggers and secondary indexes, like a restore would
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'messages'"):
+        conn.execute(f"DROP TRIGGER {name}")
+    for (name,) in conn.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'messages' AND sql IS NOT NULL
+    """).fetchall():
+        conn.execute(f"DROP INDEX {name}")
+
+    elapsed, _ = timed(load, conn, args.users, args.messages)
+    print(f"loaded {args.users} users, {args.messages} messages in {elapsed:.1f}s")
+
+    rng = random.Random(7)
+    sample = rng.sample(range(1, args.users + 1), args.no_index_sample)
+    elapsed, _ = timed(per_user_counts, conn, sample)
+    print(f"count/no-index   {elapsed / len(sample) * 1000:10.1f} ms/user  "
+          f"-> {elapsed / len(sample) * args.users:10.1f} s for all users (extrapolated)")
+
+    elapsed, _ = timed(conn.execute, "CREATE INDEX idx_messages_user_id_timestamp ON messages (user_id, timestamp)")
+    print(f"(index built in {elapsed:.1f}s)")
+    sample = rng.sample(range(1, args.users + 1), args.index_sample)
+    elapsed, _ = timed(per_user_counts, conn, sample)
+    print(f"count/index      {elapsed / len(sample) * 1000:10.3f} ms/user  "
+          f"-> {elapsed / len(sample) * args.users:10.1f} s for all users (extrapolated)")
+
+    elapsed, rows = timed(lambda: conn.execute(
+        "SELECT user_id, COUNT(*) FROM messages GROUP BY user_id"
+    ).fetchall())
+    print(f"group-by         {elapsed:10.2f} s for all users ({len(rows)} rows)")
+
+    elapsed, rows = timed(lambda: conn.execute("""
+        SELECT u.telegram_id, COALESCE(c.message_count, 0)
+        FROM users u LEFT JOIN user_message_counts c ON c.user_id = u.telegram_id
+    """).fetchall())
+    print(f"counters         {elapsed:10.2f} s for all users ({len(rows)} rows)")
+
+    elapsed, _ = timed(lambda: [db.get_user_message_count(user_id) for user_id in sample])
+    print(f"counter lookup   {elapsed / len(sample) * 1000:10.3f} ms/user")
+    db.close()
+
+
+if __name__ == "__main__":
+    main_cli()
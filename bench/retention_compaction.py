@@ -0,0 +1,129 @@
+"""Message log query time before and after retention and compaction.
+
+Builds a temporary database whose messages log spans --days days
+(mostly text, some media, contacts and locations), times a few queries
+the bot and admins run against it, applies MESSAGE_RETENTION_DAYS with
+MessageRetention (chunked deletes, archive export, incremental vacuum)
+and times the same queries again:
+
+  search     Database.search for a common word over all searchable tables
+  history    one user's latest 20 messages
+  by type    message count per message_type (full scan)
+
+    python bench/retention_compaction.py --messages 500000
+
+Runs in a temporary directory, so bot_data.db is not touched.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MESSAGE_TYPES = (("text", 80), ("photo", 10), ("document", 4), ("contact", 3), ("location", 3))
+WORDS = ("salom", "rahmat", "narx", "yordam", "buyurtma", "savol", "menyu", "bot")
+
+
+def load(conn, users, messages, days, chunk=50000):
+    rng = random.Random(42)
+    types, weights = zip(*MESSAGE_TYPES)
+    now = datetime.utcnow()
+
+    def rows(count):
+        for _ in range(count):
+            timestamp = now - timedelta(seconds=rng.uniform(0, days * 86400))
+            yield (rng.randint(1, users), " ".join(rng.choices(WORDS, k=4)),
+                   rng.choices(types, weights)[0], timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+
+    for start in range(0, messages, chunk):
+        conn.executemany(
+            "INSERT INTO messages (user_id, message_text, message_type, timestamp) VALUES (?, ?, ?, ?)",
+            rows(min(chunk, messages - start))
+        )
+        conn.commit()
+
+
+def time_queries(db, users, repeat):
+    rng = random.Random(7)
+    queries = {
+        "search": lambda: db.search("salom"),
+        "history": lambda: db.conn.execute(
+            "SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp DESC LIMIT 20", (rng.randint(1, users),)
+        ).fetchall(),
+        "by type": lambda: db.conn.execute(
+            "SELECT message_type, COUNT(*) FROM messages GROUP BY message_type"
+        ).fetchall(),
+    }
+    results = {}
+    for label, query in queries.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            query()
+        results[label] = (time.perf_counter() - started) / repeat
+    return results
+
+
+def file_size(name):
+    return sum(os.path.getsize(path) for path in (name, f"{name}-wal") if os.path.exists(path))
+
+
+async def bench(args):
+    from config import DB_PROFILE, MESSAGE_RETENTION_DAYS
+    from database import AsyncDatabase
+    from retention import MessageRetention
+
+    adb = AsyncDatabase("bench.db", profile=DB_PROFILE)
+    db = adb.db
+    started = time.perf_counter()
+    await adb.run(load, db.conn, args.users, args.messages, args.days)
+    print(f"loaded {args.messages} messages over {args.days} days in {time.perf_counter() - started:.1f}s")
+    await adb.run(db.run_maintenance)
+
+    count = "SELECT COUNT(*) FROM messages"
+    before = await adb.run(time_queries, db, args.users, args.repeat)
+    rows_before, size_before = db.conn.execute(count).fetchone()[0], file_size("bench.db")
+
+    retention = MessageRetention(adb, MESSAGE_RETENTION_DAYS, chunk_size=args.chunk_size,
+                                 archive_dir="archive", vacuum_pages=args.vacuum_pages, chunk_pause=0)
+    started = time.perf_counter()
+    pruned = await retention.run()
+    elapsed = time.perf_counter() - started
+    await adb.run(db.run_maintenance)
+
+    after = await adb.run(time_queries, db, args.users, args.repeat)
+    rows_after, size_after = db.conn.execute(count).fetchone()[0], file_size("bench.db")
+    await adb.close()
+
+    print(f"retention pass pruned {pruned} rows in {elapsed:.1f}s (rules {MESSAGE_RETENTION_DAYS})")
+    print(f"  {'':<10}{'before':>12}{'after':>12}")
+    print(f"  {'rows':<10}{rows_before:12d}{rows_after:12d}")
+    print(f"  {'file MB':<10}{size_before / 2 ** 20:12.1f}{size_after / 2 ** 20:12.1f}")
+    for label in before:
+        print(f"  {label:<10}{before[label] * 1000:10.2f}ms{after[label] * 1000:10.2f}ms")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--vacuum-pages", type=int, default=1000000,
+                        help="pages released by the incremental vacuum (the bot uses RETENTION_VACUUM_PAGES)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    os.chdir(tempfile.mkdtemp(prefix="bench-retention-"))
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,115 @@
+"""Dispatch cost per update: dict-based text commands vs a linear filter chain.
+
+Takes every text registered on main.text_commands (all keyboard button
+labels, in every locale) and builds two dispatchers with no-op handlers,
+so only update resolution is measured:
+
+  linear  one message handler per command, filtered with F.text == label
+          (F.text.in_ for handlers with several labels), in registration
+          order, then an F.text fallback; how main.py dispatched before
+          TextCommandRouter
+  dict    the same handlers on a TextCommandRouter, then the F.text
+          fallback in a second router, as main.py does now
+
+and feeds both the first registered button, the last one and free text
+that matches no button. Bot API calls are answered in-process.
+
+    python bench/text_dispatch.py --updates 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_telegram import FakeSession, make_update, parse_update  # noqa: E402
+
+
+async def noop(message):
+    pass
+
+
+def command_texts():
+    """(handler, labels) in registration order, from the bot's own TextCommandRouter."""
+    import main
+
+    grouped = {}
+    for text, handler in main.text_commands.handlers.items():
+        grouped.setdefault(handler.callback, []).append(text)
+    return list(grouped.values())
+
+
+def linear_dispatcher(commands):
+    from aiogram import Dispatcher, F, Router
+
+    router = Router()
+    for texts in commands:
+        router.message.register(noop, F.text == texts[0] if len(texts) == 1 else F.text.in_(texts))
+    router.message.register(noop, F.text)
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def dict_dispatcher(commands):
+    from aiogram import Dispatcher, F, Router
+    from text_router import TextCommandRouter
+
+    text_commands = TextCommandRouter()
+    for texts in commands:
+        text_commands.text(*texts)(noop)
+    fallback = Router()
+    fallback.message.register(noop, F.text)
+    dp = Dispatcher()
+    dp.include_router(text_commands)
+    dp.include_router(fallback)
+    return dp
+
+
+async def per_update(dp, bot, text, updates):
+    batch = [parse_update(make_update(100000 + i % 100, text)) for i in range(updates)]
+    started = time.perf_counter()
+    for update in batch:
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / updates
+
+
+async def bench(updates):
+    from aiogram import Bot
+
+    commands = command_texts()
+    cases = {
+        "first button": commands[0][0],
+        "last button": commands[-1][-1],
+        "free text": "salom, qalaysiz?",
+    }
+    bot = Bot("42:TEST", session=FakeSession())
+    results = {}
+    for name, dp in (("linear", linear_dispatcher(commands)), ("dict", dict_dispatcher(commands))):
+        # Warm up aiogram's per-handler signature caches
+        for text in cases.values():
+            await per_update(dp, bot, text, 10)
+        results[name] = {case: await per_update(dp, bot, text, updates) for case, text in cases.items()}
+    return sum(len(texts) for texts in commands), len(commands), results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=5000, help="updates fed per case")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench-dispatch-"))
+    texts, handlers, results = asyncio.run(bench(args.updates))
+    print(f"{texts} button texts on {handlers} handlers, {args.updates} updates per case (us/update)")
+    print(f"  {'':<14}" + "".join(f"{name:>10}" for name in results))
+    for case in results["linear"]:
+        print(f"  {case:<14}" + "".join(f"{timings[case] * 1e6:10.1f}" for timings in results.values()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,147 @@
+"""Update delivery latency: long polling vs webhook.
+
+Runs the real dispatcher of main.py against a local fake Bot API server
+(FakeBotAPIServer) and sends --updates /start messages from distinct
+users at --rate updates per second. Latency is measured from the moment
+an update is handed to "Telegram" to the moment the bot's reply
+(sendMessage) arrives back at the fake server:
+
+  polling  the update is queued on the server and picked up by
+           getUpdates, as in RUN_MODE = "polling"
+  webhook  the update is POSTed to the SimpleRequestHandler app that
+           run_webhook serves, as in RUN_MODE = "webhook"
+
+    python bench/webhook_vs_polling.py --updates 2000 --rate 200
+
+Both modes use loopback HTTP, so the numbers show the delivery overhead
+of each mode, not Telegram's network latency. Runs in a temporary
+directory, so bot_data.db is not touched.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_telegram import FakeBotAPIServer, make_update, percentile  # noqa: E402
+
+
+class Replies:
+    """Waits for the first reply to each chat and records its latency."""
+
+    def __init__(self):
+        self.enqueued = {}
+        self.latencies = []
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    def expect(self, count):
+        self.enqueued.clear()
+        self.latencies = []
+        self.done.clear()
+        self.expected = count
+
+    def on_send(self, chat_id, text):
+        started = self.enqueued.pop(chat_id, None)
+        if started is None:
+            return
+        self.latencies.append(time.monotonic() - started)
+        if len(self.latencies) == self.expected:
+            self.done.set()
+
+
+async def feed(replies: Replies, deliver, first_user, updates, rate):
+    """Hand `updates` /start updates to `deliver` at `rate` per second and wait for every reply."""
+    replies.expect(updates)
+    started = time.monotonic()
+    tasks = []
+    for i in range(updates):
+        delay = started + i / rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        user_id = first_user + i
+        replies.enqueued[user_id] = time.monotonic()
+        tasks.append(asyncio.create_task(deliver(make_update(user_id, "/start"))))
+    await asyncio.gather(*tasks)
+    await asyncio.wait_for(replies.done.wait(), timeout=60 + updates / rate)
+    return time.monotonic() - started
+
+
+async def bench(updates, rate, modes):
+    import main
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+    replies = Replies()
+    server = await FakeBotAPIServer(on_send=replies.on_send).start()
+    await main.bot.session.close()
+    main.bot.session = AiohttpSession(api=server.api())
+
+    main.setup_dispatcher()
+    dp = main.dp
+
+    results = {}
+    if "polling" in modes:
+        async def deliver_polling(update):
+            server.updates.put_nowait(update)
+
+        polling = asyncio.create_task(
+            dp.start_polling(main.bot, handle_signals=False, close_bot_session=False, polling_timeout=10)
+        )
+        results["polling"] = (await feed(replies, deliver_polling, 100000, updates, rate), replies.latencies)
+        await dp.stop_polling()
+        await polling
+
+    if "webhook" in modes:
+        app = web.Application()
+        SimpleRequestHandler(dp, main.bot, handle_in_background=True).register(app, path="/webhook")
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/webhook"
+
+        async with ClientSession() as client:
+            async def deliver_webhook(update):
+                async with client.post(url, json=update) as response:
+                    response.raise_for_status()
+
+            results["webhook"] = (await feed(replies, deliver_webhook, 200000, updates, rate), replies.latencies)
+        await runner.cleanup()
+
+    await main.user_upsert_middleware.close()
+    await main.db.close()
+    await main.bot.session.close()
+    await server.close()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="updates per second")
+    parser.add_argument("--mode", choices=("polling", "webhook", "both"), default="both")
+    args = parser.parse_args()
+
+    modes = ("polling", "webhook") if args.mode == "both" else (args.mode,)
+    os.chdir(tempfile.mkdtemp(prefix="bench-delivery-"))
+    results = asyncio.run(bench(args.updates, args.rate, modes))
+    print(f"updates={args.updates} rate={args.rate:g}/s")
+    for mode, (elapsed, latencies) in results.items():
+        print(
+            f"  {mode:<8} total {elapsed:6.2f}s  "
+            f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  "
+            f"p99 {percentile(latencies, 99) * 1000:8.1f} ms  "
+            f"max {max(latencies, default=0.0) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
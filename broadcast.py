@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from database import AsyncDatabase
+
+
+class TokenBucket:
+    """Token bucket limiter: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (used for Telegram flood waits)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BroadcastEngine:
+    """Concurrent, rate-limited broadcast sender with resumable delivery state.
+
+    Recipients are read from broadcast_deliveries in pages and sent by a
+    bounded pool of workers. All workers share one global token bucket and
+    a per-chat minimum interval, and a RetryAfter from Telegram pauses the
+    whole bucket before the recipient is retried (flood waits do not use
+    up a recipient's max_retries). Results are persisted in batches, so a
+    rerun of an interrupted broadcast only sends the rows that are still
+    pending.
+    """
+
+    def __init__(self, bot: Bot, db: AsyncDatabase, workers=20, rate=25, per_chat_interval=1.0,
+                 max_retries=3, page_size=1000, flush_size=100):
+        self.bot = bot
+        self.db = db
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self.page_size = page_size
+        self.flush_size = flush_size
+        self._last_sent = {}
+
+    async def _wait_for_chat(self, chat_id):
+        last_sent = self._last_sent.get(chat_id)
+        if last_sent is not None:
+            delay = last_sent + self.per_chat_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _send(self, chat_id, text):
+        """Send one message, returning (status, error).
+
+        Flood waits pause the shared bucket and are retried without counting
+        against max_retries, so a long 429 storm delays the broadcast but
+        never fails its recipients.
+        """
+        errors = 0
+        while True:
+            await self._wait_for_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text)
+                self._last_sent[chat_id] = time.monotonic()
+                return 'sent', None
+            except TelegramRetryAfter as e:
+                logging.warning(f"Flood limit hit, pausing broadcast for {e.retry_after}s")
+                self.bucket.pause(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                return 'failed', str(e)
+            except Exception as e:
+                errors += 1
+                logging.error(f"Failed to send broadcast to {chat_id} (attempt {errors}): {e}")
+                if errors > self.max_retries:
+                    return 'failed', str(e)
+
+    async def run(self, broadcast_id, text, on_progress=None, should_stop=None):
+        """Deliver all pending rows of a broadcast and return its status counts.
+
+        If `should_stop()` becomes true the remaining rows are left pending
+        and the broadcast is marked cancelled.
+        """
+        def stopped():
+            return should_stop is not None and should_stop()
+
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        results = []
+        done = 0
+
+        async def flush():
+            nonlocal results
+            batch, results = results, []
+            if batch:
+                await self.db.update_deliveries(broadcast_id, batch)
+
+        async def worker():
+            nonlocal done
+            while True:
+                chat_id = await queue.get()
+                if chat_id is None:
+                    queue.task_done()
+                    return
+                if stopped():
+                    queue.task_done()
+                    continue
+                status, error = await self._send(chat_id, text)
+                results.append((chat_id, status, error))
+                done += 1
+                if len(results) >= self.flush_size:
+                    await flush()
+                    if on_progress:
+                        await on_progress(done)
+                queue.task_done()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            after_user_id = 0
+            while True:
+                page = await self.db.get_pending_deliveries(broadcast_id, after_user_id, self.page_size)
+                if not page or stopped():
+                    break
+                for chat_id in page:
+                    await queue.put(chat_id)
+                after_user_id = page[-1]
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await flush()
+            self._last_sent.clear()
+
+        await self.db.finish_broadcast(broadcast_id, 'cancelled' if stopped() else 'finished')
+        return await self.db.get_broadcast_stats(broadcast_id)
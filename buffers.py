@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+
+class WriteBehindBuffer:
+    """Base class for the in-memory write-behind buffers.
+
+    Subclasses queue items in their own container and call schedule(),
+    which flushes flush_interval seconds after the first queued item, or
+    flush_soon() to flush right away. flush() swaps the queued batch out
+    with take() and hands it to write(), which returns the part of the
+    batch that failed (or None); that part is put back with restore() and
+    retried after another flush_interval.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._timer = None
+        self._tasks = set()
+
+    def take(self):
+        """Remove and return everything queued."""
+        raise NotImplementedError
+
+    async def write(self, batch):
+        """Write a batch taken by take(); return the part that failed, or None."""
+        raise NotImplementedError
+
+    def restore(self, batch):
+        """Put a failed batch back in front of the queue."""
+        raise NotImplementedError
+
+    def schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush_soon)
+
+    def flush_soon(self):
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self.take()
+        if not batch:
+            return
+        failed = await self.write(batch)
+        if failed:
+            self.restore(failed)
+            self.schedule()
+
+    async def close(self):
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        unwritten = self.take()
+        if unwritten:
+            logging.error(f"{type(self).__name__} closed with {len(unwritten)} unwritten items.")
@@ -3,18 +3,125 @@ import os
 # Telegram Bot Token
 BOT_TOKEN = "7574473770:AAFeYDkFd_hgIseq8mZLZZQWgVV8cgChDqs"
 
-# Admin User ID (should be integer, not string)
-ADMIN_ID = 7309800046
+# How updates are received: "polling" or "webhook"
+RUN_MODE = "polling"
 
-# Admin Password
-ADMIN_PASSWORD = "jasur08"
+# Maximum number of updates handled at the same time (updates of one user always run in order)
+UPDATE_MAX_CONCURRENCY = 100
+
+# Webhook settings (used when RUN_MODE == "webhook")
+WEBHOOK_BASE_URL = "https://example.com"  # Public HTTPS URL Telegram will POST updates to
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_SECRET = ""  # Optional X-Telegram-Bot-Api-Secret-Token value
+WEBAPP_HOST = "0.0.0.0"
+WEBAPP_PORT = 8080
+
+# Admin User IDs (integers, not strings). Feedback, complaints, questions, media and other
+# user messages are spread over them as tickets
+ADMIN_IDS = [7309800046]
+
+# How new tickets are assigned: "least_loaded" (fewest unclosed tickets) or "round_robin"
+TICKET_ASSIGNMENT = "least_loaded"
+
+# Admin password, stored as a salted hash. Generate a new one with:
+# python -c "from admin_sessions import hash_password; print(hash_password('new password'))"
+ADMIN_PASSWORD_HASH = (
+    "pbkdf2_sha256$600000$b6e942970fec7683de24dbb1ef1eeed9$"
+    "8cf79175a2e023beae48ce680dec56cd2728514de0c6b24643feebbe26570037"
+)
+
+# Seconds an admin login stays valid
+ADMIN_SESSION_TTL = 12 * 3600
 
 # Database Configuration
 DB_NAME = "bot_data.db"
 
+# SQLite performance profile, applied as PRAGMAs on connect
+# (cached_statements is the per-connection prepared statement cache size)
+DB_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB, i.e. 64 MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+    "cached_statements": 256,
+}
+
+# Seconds between WAL checkpoint + PRAGMA optimize runs
+DB_MAINTENANCE_INTERVAL = 3600
+
+# Message log write-behind: flush after this many rows or seconds, whichever comes first
+MESSAGE_LOG_BATCH_SIZE = 100
+MESSAGE_LOG_FLUSH_INTERVAL = 0.5
+
+# Maximum number of user profiles kept in the in-memory LRU cache
+USER_CACHE_SIZE = 10000
+
+# Users seen in updates are upserted in batches: flush after this many seconds or users,
+# remembering up to USER_SEEN_CACHE_SIZE profiles to skip unchanged ones
+USER_UPSERT_FLUSH_INTERVAL = 1.0
+USER_UPSERT_BATCH_SIZE = 200
+USER_SEEN_CACHE_SIZE = 100000
+
+# Persistent FSM storage: write-back delay, seconds an idle state stays in memory,
+# seconds an idle state is kept in the database, and the in-memory record cap
+FSM_FLUSH_INTERVAL = 1.0
+FSM_CACHE_TTL = 600
+FSM_STATE_TTL = 7 * 24 * 3600
+FSM_MAX_CACHED = 100000
+
+# Seconds a cached stats counter (e.g. total users) is served before re-reading it
+STATS_CACHE_TTL = 30
+
+# Broadcast engine: concurrent senders, global messages per second (Telegram allows ~30),
+# minimum seconds between messages to the same chat and retries per recipient
+BROADCAST_WORKERS = 20
+BROADCAST_RATE_LIMIT = 25
+BROADCAST_PER_CHAT_INTERVAL = 1.0
+BROADCAST_MAX_RETRIES = 3
+
+# Background job queue: concurrent jobs and minimum seconds between progress message edits
+JOB_WORKERS = 2
+JOB_PROGRESS_INTERVAL = 2.0
+
+# Seconds to wait for further parts of a photo/video album before handling it as one batch
+MEDIA_GROUP_WINDOW = 1.0
+
+# Text notifications to the admin are collected for this many seconds and sent as one digest
+ADMIN_DIGEST_INTERVAL = 2.0
+
+# Message log retention: days each message_type is kept (None keeps it forever, "*" covers
+# all other types). Pruned rows stay counted in the analytics rollups and, if
+# MESSAGE_ARCHIVE_DIR is set, are exported to gzip-compressed JSONL files there first.
+MESSAGE_RETENTION_DAYS = {
+    "text": 90,
+    "contact": None,
+    "location": None,
+    "*": 365,
+}
+MESSAGE_ARCHIVE_DIR = "archive"
+RETENTION_INTERVAL = 24 * 3600
+RETENTION_CHUNK_SIZE = 1000
+RETENTION_VACUUM_PAGES = 1000
+
+# Rows per page in admin list views
+ADMIN_PAGE_SIZE = 10
+# Matches kept for paging through an admin search
+SEARCH_MAX_RESULTS = 200
+
+# Days covered by the admin statistics dashboard
+ADMIN_STATS_DAYS = 7
+
 # Media Storage Directory
 MEDIA_DIR = "media"
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
+# Archive photos, videos and documents into MEDIA_DIR (stored once per content hash),
+# using this many concurrent downloads and at most this many queued files
+MEDIA_ARCHIVE_ENABLED = False
+MEDIA_ARCHIVE_WORKERS = 4
+MEDIA_ARCHIVE_QUEUE_SIZE = 1000
+
 # Channel/Group IDs (optional)
 CHANNEL_ID = "@your_channel"  # Replace with your channel username
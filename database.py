@@ -1,30 +1,170 @@
 import sqlite3
+import asyncio
 import logging
-from datetime import datetime
+import functools
+import time
+import threading
+import re
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from buffers import WriteBehindBuffer
+from migrations import run_migrations, SEARCH_COLUMNS
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self.data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self.data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self.data.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
 class Database:
-    def __init__(self, db_name):
+    # kind -> (SELECT ... FROM ..., sort timestamp column, sort id column) for get_page
+    PAGE_QUERIES = {
+        'users': ("""
+            SELECT u.telegram_id, u.username, u.first_name, u.last_name, COALESCE(c.message_count, 0),
+                   u.added_at, u.id
+            FROM users u
+                     LEFT JOIN user_message_counts c ON c.user_id = u.telegram_id
+        """, "u.added_at", "u.id"),
+        'feedback': ("""
+            SELECT f.feedback_text, u.first_name, u.username, f.timestamp, f.id
+            FROM feedback f
+                     JOIN users u ON f.user_id = u.telegram_id
+        """, "f.timestamp", "f.id"),
+        'suggestions': ("""
+            SELECT s.suggestion_text, u.first_name, u.username, s.timestamp, s.id
+            FROM suggestions s
+                     JOIN users u ON s.user_id = u.telegram_id
+        """, "s.timestamp", "s.id"),
+        'complaints': ("""
+            SELECT c.complaint_text, u.first_name, u.username, c.timestamp, c.id
+            FROM complaints c
+                     JOIN users u ON c.user_id = u.telegram_id
+        """, "c.timestamp", "c.id"),
+        'questions': ("""
+            SELECT q.question_text, u.first_name, u.username, q.timestamp, q.id
+            FROM questions q
+                     JOIN users u ON q.user_id = u.telegram_id
+        """, "q.timestamp", "q.id"),
+    }
+
+    # Pragmas a performance profile may set, with the values each one accepts
+    PROFILE_PRAGMAS = {
+        'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+        'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+        'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+        'mmap_size': int,
+        'cache_size': int,
+        'busy_timeout': int,
+    }
+
+    def __init__(self, db_name, stats_cache_ttl=30, profile=None, user_cache_size=10000, button_texts=None):
         self.db_name = db_name
         self.conn = None
-        self.cursor = None
+        self.profile = self.validate_profile(profile or {})
+        self.user_cache = LRUCache(user_cache_size)
+        # Text messages equal to one of these labels are counted as presses of the mapped button
+        # (its label in the default locale) in the analytics rollups
+        self.button_texts = dict(button_texts or {})
+        self.stats_cache_ttl = stats_cache_ttl
+        # counter name -> (value, expires_at)
+        self.stats_cache = {}
         self.connect()
         self.create_tables()
 
+    @classmethod
+    def validate_profile(cls, profile):
+        """Check a performance profile and return it with normalised values.
+
+        Raises ValueError for unknown pragmas or values, since pragma values
+        are interpolated into SQL and cannot be bound as parameters.
+        """
+        validated = {}
+        for key, value in profile.items():
+            if key == 'cached_statements':
+                validated[key] = int(value)
+                continue
+            allowed = cls.PROFILE_PRAGMAS.get(key)
+            if allowed is None:
+                raise ValueError(f"Unknown database profile setting: {key}")
+            if allowed is int:
+                validated[key] = int(value)
+            elif str(value).upper() in allowed:
+                validated[key] = str(value).upper()
+            else:
+                raise ValueError(f"Invalid value for {key}: {value}")
+        return validated
+
     def connect(self):
         try:
-            self.conn = sqlite3.connect(self.db_name, check_same_thread=False)
-            self.cursor = self.conn.cursor()
+            self.conn = sqlite3.connect(
+                self.db_name,
+                check_same_thread=False,
+                cached_statements=self.profile.get('cached_statements', 128)
+            )
+            for key, value in self.profile.items():
+                if key != 'cached_statements':
+                    self.conn.execute(f"PRAGMA {key} = {value}")
             logging.info(f"Connected to database: {self.db_name}")
         except sqlite3.Error as e:
             logging.error(f"Database connection error: {e}")
 
+    def run_maintenance(self):
+        """Checkpoint the WAL back into the main file and refresh planner statistics."""
+        try:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("PRAGMA optimize")
+            logging.info("Database maintenance completed.")
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Database maintenance error: {e}")
+            return False
+
     def create_tables(self):
+        cursor = self.conn.cursor()
         try:
             # Users table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS users
                                 (
                                     id
@@ -52,7 +192,7 @@ class Database:
                                 """)
 
             # Messages table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS messages
                                 (
                                     id
@@ -84,7 +224,7 @@ class Database:
                                 """)
 
             # Feedback table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS feedback
                                 (
                                     id
@@ -112,7 +252,7 @@ class Database:
                                 """)
 
             # Suggestions table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS suggestions
                                 (
                                     id
@@ -140,7 +280,7 @@ class Database:
                                 """)
 
             # Complaints table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS complaints
                                 (
                                     id
@@ -168,7 +308,7 @@ class Database:
                                 """)
 
             # Questions table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS questions
                                 (
                                     id
@@ -196,7 +336,7 @@ class Database:
                                 """)
 
             # Promocodes table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS promocodes
                                 (
                                     id
@@ -221,7 +361,7 @@ class Database:
                                 """)
 
             # Admin sessions table
-            self.cursor.execute("""
+            cursor.execute("""
                                 CREATE TABLE IF NOT EXISTS admin_sessions
                                 (
                                     user_id
@@ -241,16 +381,26 @@ class Database:
             logging.info("Tables created or already exist.")
         except sqlite3.Error as e:
             logging.error(f"Error creating tables: {e}")
+            return
+
+        version = run_migrations(self.conn)
+        logging.info(f"Database schema version: {version}")
 
     def add_user(self, telegram_id, username, first_name, last_name, is_bot, language_code):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT
                                 OR IGNORE INTO users (telegram_id, username, first_name, last_name, is_bot, language_code)
                 VALUES (?, ?, ?, ?, ?, ?)
                                 """, (telegram_id, username, first_name, last_name, is_bot, language_code))
+            added = cursor.rowcount > 0
+            if added:
+                self._increment_counter('users')
             self.conn.commit()
-            if self.cursor.rowcount > 0:
+            self._load_user(telegram_id)
+            if added:
+                self.stats_cache.pop('users', None)
                 logging.info(f"User {telegram_id} added to database.")
                 return True
             else:
@@ -260,24 +410,105 @@ class Database:
             logging.error(f"Error adding user {telegram_id}: {e}")
             return False
 
+    def upsert_users(self, rows):
+        """Insert or refresh (telegram_id, username, first_name, last_name, is_bot, language_code) rows.
+
+        Runs as one transaction; rows whose stored profile is unchanged are
+        not rewritten. Returns the number of newly added users.
+        """
+        cursor = self.conn.cursor()
+        ids = [row[0] for row in rows]
+        try:
+            cursor.execute(
+                f"SELECT telegram_id FROM users WHERE telegram_id IN ({', '.join('?' * len(ids))})", ids
+            )
+            added = len(ids) - len(cursor.fetchall())
+            cursor.executemany("""
+                INSERT INTO users (telegram_id, username, first_name, last_name, is_bot, language_code)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (telegram_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    last_name = excluded.last_name,
+                    is_bot = excluded.is_bot,
+                    language_code = excluded.language_code
+                WHERE users.username IS NOT excluded.username
+                   OR users.first_name IS NOT excluded.first_name
+                   OR users.last_name IS NOT excluded.last_name
+                   OR users.is_bot IS NOT excluded.is_bot
+                   OR users.language_code IS NOT excluded.language_code
+            """, rows)
+            if added:
+                self._increment_counter('users', added)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error upserting {len(rows)} users: {e}")
+            return None
+
+        for telegram_id in ids:
+            self.user_cache.pop(telegram_id)
+        if added:
+            self.stats_cache.pop('users', None)
+        logging.info(f"Upserted {len(rows)} users ({added} new).")
+        return added
+
+    def _increment_counter(self, name, delta=1):
+        self.conn.execute("""
+            INSERT INTO stats_counters (name, value)
+            VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+        """, (name, delta))
+
+    def get_cached_counter(self, name):
+        """Return the cached value of a counter, or None if it is missing or expired."""
+        cached = self.stats_cache.get(name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def get_counter(self, name):
+        cursor = self.conn.cursor()
+        value = self.get_cached_counter(name)
+        if value is not None:
+            return value
+        cursor.execute("SELECT value FROM stats_counters WHERE name = ?", (name,))
+        result = cursor.fetchone()
+        value = result[0] if result else 0
+        self.stats_cache[name] = (value, time.monotonic() + self.stats_cache_ttl)
+        return value
+
     def user_exists(self, telegram_id):
-        self.cursor.execute("SELECT 1 FROM users WHERE telegram_id = ?", (telegram_id,))
-        return self.cursor.fetchone() is not None
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM users WHERE telegram_id = ?", (telegram_id,))
+        return cursor.fetchone() is not None
 
-    def get_user(self, telegram_id):
-        self.cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,))
-        return self.cursor.fetchone()
+    def _load_user(self, telegram_id):
+        """Read a user row from the database and refresh its cache entry."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,))
+        user = cursor.fetchone()
+        if user:
+            self.user_cache.set(telegram_id, user)
+        else:
+            self.user_cache.pop(telegram_id)
+        return user
 
-    def get_all_users(self):
-        self.cursor.execute("SELECT telegram_id, username, first_name, last_name FROM users")
-        return self.cursor.fetchall()
+    def get_user(self, telegram_id):
+        user = self.user_cache.get(telegram_id)
+        if user is not None:
+            return user
+        return self._load_user(telegram_id)
 
     def add_message(self, user_id, message_text, message_type, file_id=None):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO messages (user_id, message_text, message_type, file_id)
                                 VALUES (?, ?, ?, ?)
                                 """, (user_id, message_text, message_type, file_id))
+            self._increment_message_counts([(user_id, 1)])
+            self._update_rollups([(user_id, message_text, message_type)])
             self.conn.commit()
             logging.info(f"Message from user {user_id} ({message_type}) logged.")
             return True
@@ -285,13 +516,115 @@ class Database:
             logging.error(f"Error adding message for user {user_id}: {e}")
             return False
 
+    def add_messages(self, rows):
+        """Insert (user_id, message_text, message_type, file_id) rows in one transaction."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany("""
+                                    INSERT INTO messages (user_id, message_text, message_type, file_id)
+                                    VALUES (?, ?, ?, ?)
+                                    """, rows)
+            self._increment_message_counts(Counter(row[0] for row in rows).items())
+            self._update_rollups(rows)
+            self.conn.commit()
+            logging.info(f"{len(rows)} messages logged.")
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error adding {len(rows)} messages: {e}")
+            return False
+
+    def _increment_message_counts(self, counts):
+        self.conn.executemany("""
+            INSERT INTO user_message_counts (user_id, message_count)
+            VALUES (?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET message_count = message_count + excluded.message_count
+        """, counts)
+
+    def _update_rollups(self, rows):
+        """Add (user_id, message_text, message_type, ...) rows, logged now, to the analytics rollups."""
+        now = datetime.utcnow()
+        day, hour = now.strftime("%Y-%m-%d"), now.hour
+        types = Counter(row[2] for row in rows)
+        self.conn.executemany("""
+            INSERT INTO messages_daily (day, message_type, message_count)
+            VALUES (?, ?, ?)
+            ON CONFLICT (day, message_type) DO UPDATE SET message_count = message_count + excluded.message_count
+        """, [(day, message_type, count) for message_type, count in types.items()])
+        self.conn.execute("""
+            INSERT INTO messages_hourly (day, hour, message_count)
+            VALUES (?, ?, ?)
+            ON CONFLICT (day, hour) DO UPDATE SET message_count = message_count + excluded.message_count
+        """, (day, hour, len(rows)))
+        buttons = Counter(self.button_texts[row[1]] for row in rows
+                          if row[2] == 'text' and row[1] in self.button_texts)
+        if buttons:
+            self.conn.executemany("""
+                INSERT INTO button_presses (day, button_text, press_count)
+                VALUES (?, ?, ?)
+                ON CONFLICT (day, button_text) DO UPDATE SET press_count = press_count + excluded.press_count
+            """, [(day, text, count) for text, count in buttons.items()])
+        # rowcount only counts users not yet seen today, which keeps daily_stats.active_users exact
+        new_users = self.conn.executemany(
+            "INSERT OR IGNORE INTO daily_active_users (day, user_id) VALUES (?, ?)",
+            [(day, user_id) for user_id in {row[0] for row in rows}]
+        ).rowcount
+        if new_users:
+            self.conn.execute("""
+                INSERT INTO daily_stats (day, active_users)
+                VALUES (?, ?)
+                ON CONFLICT (day) DO UPDATE SET active_users = active_users + excluded.active_users
+            """, (day, new_users))
+
+    def get_dashboard(self, days=7, top=5):
+        """Admin analytics over the last `days` days, read from the rollup tables only."""
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        conn = self.conn
+        return {
+            'daily': conn.execute("""
+                SELECT d.day, COALESCE(s.active_users, 0), SUM(d.message_count)
+                FROM messages_daily d
+                         LEFT JOIN daily_stats s ON s.day = d.day
+                WHERE d.day >= ?
+                GROUP BY d.day
+                ORDER BY d.day DESC
+            """, (since,)).fetchall(),
+            'types': conn.execute("""
+                SELECT message_type, SUM(message_count) AS total
+                FROM messages_daily
+                WHERE day >= ?
+                GROUP BY message_type
+                ORDER BY total DESC
+            """, (since,)).fetchall(),
+            'hours': conn.execute("""
+                SELECT hour, SUM(message_count) AS total
+                FROM messages_hourly
+                WHERE day >= ?
+                GROUP BY hour
+                ORDER BY total DESC
+                LIMIT ?
+            """, (since, top)).fetchall(),
+            'buttons': conn.execute("""
+                SELECT button_text, SUM(press_count) AS total
+                FROM button_presses
+                WHERE day >= ?
+                GROUP BY button_text
+                ORDER BY total DESC
+                LIMIT ?
+            """, (since, top)).fetchall(),
+            'total_messages': conn.execute("SELECT COALESCE(SUM(message_count), 0) FROM messages_daily").fetchone()[0],
+        }
+
     def get_user_message_count(self, user_id):
-        self.cursor.execute("SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,))
-        return self.cursor.fetchone()[0]
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT message_count FROM user_message_counts WHERE user_id = ?", (user_id,))
+        result = cursor.fetchone()
+        return result[0] if result else 0
 
     def add_feedback(self, user_id, feedback_text):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO feedback (user_id, feedback_text)
                                 VALUES (?, ?)
                                 """, (user_id, feedback_text))
@@ -302,8 +635,9 @@ class Database:
             return False
 
     def add_suggestion(self, user_id, suggestion_text):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO suggestions (user_id, suggestion_text)
                                 VALUES (?, ?)
                                 """, (user_id, suggestion_text))
@@ -314,8 +648,9 @@ class Database:
             return False
 
     def add_complaint(self, user_id, complaint_text):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO complaints (user_id, complaint_text)
                                 VALUES (?, ?)
                                 """, (user_id, complaint_text))
@@ -326,8 +661,9 @@ class Database:
             return False
 
     def add_question(self, user_id, question_text):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO questions (user_id, question_text)
                                 VALUES (?, ?)
                                 """, (user_id, question_text))
@@ -338,8 +674,9 @@ class Database:
             return False
 
     def add_promocode(self, code, description):
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
+            cursor.execute("""
                                 INSERT INTO promocodes (code, description)
                                 VALUES (?, ?)
                                 """, (code, description))
@@ -350,63 +687,531 @@ class Database:
             return False
 
     def check_promocode(self, code):
-        self.cursor.execute("SELECT * FROM promocodes WHERE code = ? AND is_active = 1", (code,))
-        return self.cursor.fetchone()
-
-    def get_all_feedback(self):
-        self.cursor.execute("""
-                            SELECT f.feedback_text, u.first_name, u.username, f.timestamp
-                            FROM feedback f
-                                     JOIN users u ON f.user_id = u.telegram_id
-                            ORDER BY f.timestamp DESC
-                            """)
-        return self.cursor.fetchall()
-
-    def get_all_suggestions(self):
-        self.cursor.execute("""
-                            SELECT s.suggestion_text, u.first_name, u.username, s.timestamp
-                            FROM suggestions s
-                                     JOIN users u ON s.user_id = u.telegram_id
-                            ORDER BY s.timestamp DESC
-                            """)
-        return self.cursor.fetchall()
-
-    def get_all_complaints(self):
-        self.cursor.execute("""
-                            SELECT c.complaint_text, u.first_name, u.username, c.timestamp
-                            FROM complaints c
-                                     JOIN users u ON c.user_id = u.telegram_id
-                            ORDER BY c.timestamp DESC
-                            """)
-        return self.cursor.fetchall()
-
-    def get_all_questions(self):
-        self.cursor.execute("""
-                            SELECT q.question_text, u.first_name, u.username, q.timestamp
-                            FROM questions q
-                                     JOIN users u ON q.user_id = u.telegram_id
-                            ORDER BY q.timestamp DESC
-                            """)
-        return self.cursor.fetchall()
-
-    def set_admin_session(self, user_id, is_logged_in):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM promocodes WHERE code = ? AND is_active = 1", (code,))
+        return cursor.fetchone()
+
+    def create_broadcast(self, message_text):
+        """Create a broadcast with one pending delivery row per user and return its id."""
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO admin_sessions (user_id, is_logged_in, login_time)
-                VALUES (?, ?, ?)
-            """, (user_id, is_logged_in, datetime.now() if is_logged_in else None))
+            cursor.execute("INSERT INTO broadcasts (message_text) VALUES (?)", (message_text,))
+            broadcast_id = cursor.lastrowid
+            cursor.execute("""
+                INSERT INTO broadcast_deliveries (broadcast_id, user_id)
+                SELECT ?, telegram_id FROM users
+            """, (broadcast_id,))
+            self.conn.commit()
+            return broadcast_id
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error creating broadcast: {e}")
+            return None
+
+    def get_pending_deliveries(self, broadcast_id, after_user_id=0, limit=1000):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT user_id FROM broadcast_deliveries
+            WHERE broadcast_id = ? AND status = 'pending' AND user_id > ?
+            ORDER BY user_id
+            LIMIT ?
+        """, (broadcast_id, after_user_id, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    def update_deliveries(self, broadcast_id, results):
+        """Persist (user_id, status, error) delivery results in one transaction."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany("""
+                UPDATE broadcast_deliveries SET status = ?, error = ?
+                WHERE broadcast_id = ? AND user_id = ?
+            """, [(status, error, broadcast_id, user_id) for user_id, status, error in results])
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error updating deliveries for broadcast {broadcast_id}: {e}")
+            return False
+
+    def finish_broadcast(self, broadcast_id, status='finished'):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?
+            """, (status, datetime.now(), broadcast_id))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Error finishing broadcast {broadcast_id}: {e}")
+            return False
+
+    def get_broadcast_stats(self, broadcast_id):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT status, COUNT(*) FROM broadcast_deliveries
+            WHERE broadcast_id = ?
+            GROUP BY status
+        """, (broadcast_id,))
+        return dict(cursor.fetchall())
+
+    def get_page(self, kind, cursor=None, direction='next', limit=10):
+        """Return one page of `kind`, newest first, keyed on (timestamp, id).
+
+        `cursor` is the (timestamp, id) of the last row of the current page
+        when moving 'next' (older) or of its first row when moving 'prev'
+        (newer). Returns (rows, has_prev, has_next); the last two columns of
+        every row are its (timestamp, id) key.
+        """
+        select, ts_column, id_column = self.PAGE_QUERIES[kind]
+        where = ""
+        params = ()
+        if cursor:
+            where = f"WHERE ({ts_column}, {id_column}) {'<' if direction == 'next' else '>'} (?, ?)"
+            params = tuple(cursor)
+        order = "DESC" if direction == 'next' else "ASC"
+        rows = self.conn.execute(
+            f"{select} {where} ORDER BY {ts_column} {order}, {id_column} {order} LIMIT ?",
+            params + (limit + 1,)
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if direction == 'next':
+            return rows, cursor is not None, has_more
+        rows.reverse()
+        return rows, has_more, True
+
+    @staticmethod
+    def _fts_query(query):
+        """Turn free text into an FTS5 query: every word must match, as a prefix, with no FTS syntax."""
+        return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+
+    def search(self, query, kinds=None, limit=200):
+        """Full-text search over the SEARCH_COLUMNS tables.
+
+        Returns the best `limit` matches as (kind, id) pairs, best first.
+        bm25 scores change with every write to the searched tables, so the
+        caller pages through this fixed list with get_search_rows instead
+        of re-ranking for each page.
+        """
+        fts_query = self._fts_query(query)
+        kinds = [kind for kind in (kinds or SEARCH_COLUMNS) if kind in SEARCH_COLUMNS]
+        if not fts_query or not kinds:
+            return []
+
+        selects = [f"""
+            SELECT '{kind}' AS kind, rowid AS id, bm25({kind}_fts) AS rank
+            FROM {kind}_fts
+            WHERE {kind}_fts MATCH ?
+        """ for kind in kinds]
+        try:
+            rows = self.conn.execute(
+                f"SELECT kind, id FROM ({' UNION ALL '.join(selects)}) ORDER BY rank, kind, id LIMIT ?",
+                (fts_query,) * len(kinds) + (limit,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error searching for {query!r}: {e}")
+            return []
+        return rows
+
+    def get_search_rows(self, query, refs):
+        """Rows for (kind, id) pairs returned by search, in the same order.
+
+        Rows are (kind, id, snippet, first_name, username, timestamp); matched
+        terms in the snippet are wrapped in \\x02 ... \\x03. Rows deleted since
+        the search are skipped.
+        """
+        fts_query = self._fts_query(query)
+        ids = {}
+        for kind, row_id in refs:
+            if kind in SEARCH_COLUMNS:
+                ids.setdefault(kind, []).append(row_id)
+        found = {}
+        try:
+            for kind, kind_ids in ids.items():
+                cursor = self.conn.execute(f"""
+                    SELECT '{kind}', t.id, snippet({kind}_fts, 0, char(2), char(3), '…', 16),
+                           u.first_name, u.username, t.timestamp
+                    FROM {kind}_fts
+                             JOIN {kind} t ON t.id = {kind}_fts.rowid
+                             LEFT JOIN users u ON u.telegram_id = t.user_id
+                    WHERE {kind}_fts MATCH ? AND {kind}_fts.rowid IN ({', '.join('?' * len(kind_ids))})
+                """, (fts_query, *kind_ids))
+                found.update(((row[0], row[1]), row) for row in cursor)
+        except sqlite3.Error as e:
+            logging.error(f"Error loading search results for {query!r}: {e}")
+            return []
+        return [found[(kind, row_id)] for kind, row_id in refs if (kind, row_id) in found]
+
+    def get_fsm_record(self, storage_key):
+        """Return the stored (state, data_json) for an FSM key, or None."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT state, data FROM fsm_storage WHERE storage_key = ?", (storage_key,))
+        return cursor.fetchone()
+
+    def save_fsm_records(self, records):
+        """Persist (storage_key, state, data_json, updated_at) records in one transaction.
+
+        Records with neither state nor data are deleted instead of stored.
+        """
+        upserts = [record for record in records if record[1] is not None or record[2] is not None]
+        deletes = [(record[0],) for record in records if record[1] is None and record[2] is None]
+        try:
+            self.conn.executemany("""
+                INSERT INTO fsm_storage (storage_key, state, data, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (storage_key) DO UPDATE SET
+                    state = excluded.state,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+            """, upserts)
+            self.conn.executemany("DELETE FROM fsm_storage WHERE storage_key = ?", deletes)
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error saving {len(records)} FSM records: {e}")
+            return False
+
+    def delete_expired_fsm_records(self, older_than):
+        """Delete FSM records not updated since the `older_than` unix time."""
+        try:
+            cursor = self.conn.execute("DELETE FROM fsm_storage WHERE updated_at < ?", (older_than,))
+            self.conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error deleting expired FSM records: {e}")
+            return 0
+
+    def get_expired_messages(self, cutoff, limit, message_type=None, exclude_types=()):
+        """Oldest messages logged before `cutoff`, either of `message_type` or of any type not in `exclude_types`."""
+        if message_type is not None:
+            condition, params = "message_type = ?", (message_type,)
+        else:
+            condition = f"message_type NOT IN ({', '.join('?' * len(exclude_types))})" if exclude_types else "1"
+            params = tuple(exclude_types)
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT id, user_id, message_text, message_type, file_id, timestamp
+            FROM messages
+            WHERE timestamp < ? AND {condition}
+            ORDER BY timestamp, id
+            LIMIT ?
+        """, (cutoff, *params, limit))
+        return cursor.fetchall()
+
+    def archive_messages(self, rows):
+        """Delete rows returned by get_expired_messages (they are already counted in the rollups)."""
+        try:
+            self.conn.executemany("DELETE FROM messages WHERE id = ?", [(row[0],) for row in rows])
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error archiving {len(rows)} messages: {e}")
+            return False
+
+    def prune_daily_active_users(self, before_day):
+        """Delete the per-user activity rows of days before `before_day` (daily_stats keeps their counts)."""
+        try:
+            deleted = self.conn.execute("DELETE FROM daily_active_users WHERE day < ?", (before_day,)).rowcount
+            self.conn.commit()
+            return deleted
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error pruning daily active users: {e}")
+            return None
+
+    def incremental_vacuum(self, pages):
+        """Return up to `pages` free pages to the filesystem; needs incremental auto_vacuum (migration 13)."""
+        try:
+            if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                logging.info("Skipping incremental vacuum: database is not in incremental auto_vacuum mode.")
+                return False
+            # The pragma frees one page per step and returns no rows, so execute() would stop after
+            # the first page; executescript() steps it to completion
+            self.conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Incremental vacuum error: {e}")
+            return False
+
+    def create_job(self, kind, payload, chat_id):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO jobs (kind, payload, chat_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (kind, payload, chat_id, datetime.now(), datetime.now()))
+            self.conn.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logging.error(f"Error creating {kind} job: {e}")
+            return None
+
+    def get_job(self, job_id):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, kind, payload, status, progress, total, result, chat_id, message_id
+            FROM jobs WHERE id = ?
+        """, (job_id,))
+        return cursor.fetchone()
+
+    def get_unfinished_jobs(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY id")
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_recent_jobs(self, limit=10):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, kind, status, progress, total, created_at
+            FROM jobs ORDER BY id DESC LIMIT ?
+        """, (limit,))
+        return cursor.fetchall()
+
+    def update_job(self, job_id, **fields):
+        """Update status, progress, total, result or message_id of a job."""
+        allowed = {'status', 'progress', 'total', 'result', 'message_id'}
+        if not fields or not set(fields) <= allowed:
+            raise ValueError(f"Invalid job fields: {sorted(fields)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        try:
+            self.conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), datetime.now(), job_id)
+            )
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Error updating job {job_id}: {e}")
+            return False
+
+    def get_media(self, file_unique_id):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT sha256, path, size FROM media_index WHERE file_unique_id = ?", (file_unique_id,))
+        return cursor.fetchone()
+
+    def get_media_by_hash(self, sha256):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT path, size FROM media_index WHERE sha256 = ? LIMIT 1", (sha256,))
+        return cursor.fetchone()
+
+    def add_media(self, file_unique_id, sha256, path, size):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT OR IGNORE INTO media_index (file_unique_id, sha256, path, size, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (file_unique_id, sha256, path, size, datetime.now()))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"Error indexing media {file_unique_id}: {e}")
+            return False
+
+    def create_ticket(self, user_id, kind, summary, admin_id):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO tickets (user_id, kind, summary, admin_id, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, kind, summary, admin_id, datetime.now()))
+            self.conn.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logging.error(f"Error creating {kind} ticket: {e}")
+            return None
+
+    def claim_ticket(self, ticket_id, admin_id):
+        """Take over an open ticket. Returns its (status, admin_id) from before the claim, or None."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT status, admin_id FROM tickets WHERE id = ?", (ticket_id,))
+            row = cursor.fetchone()
+            if row and row[0] == 'open':
+                cursor.execute("""
+                    UPDATE tickets SET status = 'claimed', admin_id = ?, claimed_at = ? WHERE id = ?
+                """, (admin_id, datetime.now(), ticket_id))
+                self.conn.commit()
+            return row
+        except sqlite3.Error as e:
+            logging.error(f"Error claiming ticket {ticket_id}: {e}")
+            return None
+
+    def close_ticket(self, ticket_id, admin_id):
+        """Close a ticket owned by admin_id. Returns False if it is not theirs or already closed."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE tickets SET status = 'closed', closed_at = ?
+                WHERE id = ? AND admin_id = ? AND status != 'closed'
+            """, (datetime.now(), ticket_id, admin_id))
+            self.conn.commit()
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logging.error(f"Error closing ticket {ticket_id}: {e}")
+            return False
+
+    def get_ticket_loads(self):
+        """admin_id -> number of tickets assigned to them and not yet closed."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT admin_id, COUNT(*) FROM tickets
+            WHERE status IN ('open', 'claimed')
+            GROUP BY admin_id
+        """)
+        return dict(cursor.fetchall())
+
+    def get_admin_tickets(self, admin_id, limit=20):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT t.id, t.kind, t.summary, t.status, t.created_at, u.first_name, u.username
+            FROM tickets t
+            LEFT JOIN users u ON u.telegram_id = t.user_id
+            WHERE t.admin_id = ? AND t.status IN ('open', 'claimed')
+            ORDER BY t.id
+            LIMIT ?
+        """, (admin_id, limit))
+        return cursor.fetchall()
+
+    def get_open_tickets(self, limit=20):
+        """Unclaimed tickets of every admin, oldest first, so any admin can claim them."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT t.id, t.kind, t.summary, t.admin_id, t.created_at, u.first_name, u.username
+            FROM tickets t
+            LEFT JOIN users u ON u.telegram_id = t.user_id
+            WHERE t.status = 'open'
+            ORDER BY t.id
+            LIMIT ?
+        """, (limit,))
+        return cursor.fetchall()
+
+    def set_admin_session(self, user_id, is_logged_in, expires_at=None):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT OR REPLACE INTO admin_sessions (user_id, is_logged_in, login_time, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, is_logged_in, datetime.now() if is_logged_in else None, expires_at))
             self.conn.commit()
             return True
         except sqlite3.Error as e:
             logging.error(f"Error setting admin session: {e}")
             return False
 
-    def is_admin_logged_in(self, user_id):
-        self.cursor.execute("SELECT is_logged_in FROM admin_sessions WHERE user_id = ?", (user_id,))
-        result = self.cursor.fetchone()
-        return result and result[0] == 1
+    def get_admin_sessions(self, now):
+        """(user_id, expires_at) of the admin sessions still valid at `now`."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT user_id, expires_at FROM admin_sessions
+                WHERE is_logged_in = 1 AND expires_at > ?
+            """, (now,))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error getting admin sessions: {e}")
+            return []
 
     def close(self):
         if self.conn:
             self.conn.close()
             logging.info("Database connection closed.")
+
+
+class MessageLogBuffer(WriteBehindBuffer):
+    """Write-behind buffer for the messages log.
+
+    Rows are queued in memory and written with a single executemany
+    transaction once batch_size rows are pending or flush_interval
+    seconds after the first queued row, whichever comes first. A batch
+    whose transaction fails is put back and retried with the next flush;
+    beyond max_pending queued rows the oldest are dropped and logged.
+    """
+
+    def __init__(self, adb, batch_size=100, flush_interval=0.5, max_pending=100000):
+        super().__init__(flush_interval)
+        self.adb = adb
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.rows = []
+
+    def add(self, user_id, message_text, message_type, file_id=None):
+        self.rows.append((user_id, message_text, message_type, file_id))
+        if len(self.rows) >= self.batch_size:
+            self.flush_soon()
+        else:
+            self.schedule()
+
+    def take(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    async def write(self, rows):
+        return None if await self.adb.run(self.adb.db.add_messages, rows) else rows
+
+    def restore(self, rows):
+        self.rows[:0] = rows
+        overflow = len(self.rows) - self.max_pending
+        if overflow > 0:
+            del self.rows[:overflow]
+            logging.error(f"Message log buffer full, dropped {overflow} messages.")
+
+
+class AsyncDatabase:
+    """Awaitable wrapper around Database.
+
+    Every call is executed on a single dedicated worker thread, so SQLite
+    work (including commit fsyncs) never blocks the event loop and the
+    connection is only ever touched by one thread at a time.
+    """
+
+    def __init__(self, db_name, log_batch_size=100, log_flush_interval=0.5, stats_cache_ttl=30, profile=None,
+                 user_cache_size=10000, button_texts=None):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.db = self._executor.submit(
+            Database, db_name, stats_cache_ttl, profile, user_cache_size, button_texts
+        ).result()
+        self.message_log = MessageLogBuffer(self, log_batch_size, log_flush_interval)
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return wrapper
+
+    async def add_message(self, user_id, message_text, message_type, file_id=None):
+        self.message_log.add(user_id, message_text, message_type, file_id)
+        return True
+
+    async def get_counter(self, name):
+        # Cache hits are served on the event loop without an executor round-trip
+        value = self.db.get_cached_counter(name)
+        if value is not None:
+            return value
+        return await self.run(self.db.get_counter, name)
+
+    async def get_user(self, telegram_id):
+        user = self.db.user_cache.get(telegram_id)
+        if user is not None:
+            return user
+        return await self.run(self.db._load_user, telegram_id)
+
+    async def run_periodic_maintenance(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.run(self.db.run_maintenance)
+
+    async def close(self):
+        await self.message_log.close()
+        await self.run(self.db.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LOCALE = "uz"
+
+
+def flatten(tree, prefix=""):
+    """{"a": {"b": "text"}} -> {"a.b": "text"}"""
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+class I18n:
+    """Message catalogs compiled once into flat dicts.
+
+    Every locales/<locale>.json file is loaded and flattened to dotted
+    keys ("photo.prompt") at startup, and keys a translation lacks are
+    filled from the default locale, so a lookup is always a single dict
+    access. Telegram language codes ("ru", "en-US", None, ...) are mapped
+    to a supported locale once per distinct code and memoised.
+    """
+
+    def __init__(self, locales_dir=LOCALES_DIR, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        catalogs = {}
+        for file_name in sorted(os.listdir(locales_dir)):
+            locale, ext = os.path.splitext(file_name)
+            if ext != ".json":
+                continue
+            with open(os.path.join(locales_dir, file_name), encoding="utf-8") as f:
+                catalogs[locale] = flatten(json.load(f))
+        default = catalogs[default_locale]
+        self.catalogs = {}
+        for locale, catalog in catalogs.items():
+            missing = default.keys() - catalog.keys()
+            if missing and locale != default_locale:
+                logging.debug(f"Locale {locale}: {len(missing)} keys fall back to {default_locale}")
+            self.catalogs[locale] = {**default, **catalog}
+        # language_code -> locale
+        self._resolved = {}
+
+    @property
+    def locales(self):
+        return tuple(self.catalogs)
+
+    def resolve(self, language_code) -> str:
+        """Supported locale for a Telegram language_code."""
+        locale = self._resolved.get(language_code)
+        if locale is None:
+            base = (language_code or "").split("-")[0].lower()
+            locale = base if base in self.catalogs else self.default_locale
+            self._resolved[language_code] = locale
+        return locale
+
+    def get(self, locale, key, **kwargs) -> str:
+        text = self.catalogs.get(locale, self.catalogs[self.default_locale])[key]
+        return text.format(**kwargs) if kwargs else text
+
+
+i18n = I18n()
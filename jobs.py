@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import time
+
+from aiogram import Bot
+
+from database import AsyncDatabase
+from keyboards import job_keyboard
+
+JOB_STATUS_LABELS = {
+    'queued': "⏳ Navbatda",
+    'running': "🔄 Bajarilmoqda",
+    'done': "✅ Yakunlandi",
+    'failed': "❌ Xatolik",
+    'cancelled': "🚫 Bekor qilindi",
+}
+
+
+class Job:
+    """A running job as seen by its handler."""
+
+    def __init__(self, queue, job_id, payload, chat_id, message_id):
+        self.queue = queue
+        self.id = job_id
+        self.payload = payload
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self._reported_at = 0.0
+
+    @property
+    def cancelled(self):
+        return self.id in self.queue.cancelled
+
+    async def report(self, progress, total=None, force=False):
+        """Persist progress and edit the progress message, at most once per progress_interval unless forced."""
+        now = time.monotonic()
+        if not force and now - self._reported_at < self.queue.progress_interval:
+            return
+        self._reported_at = now
+        fields = {'progress': progress} if total is None else {'progress': progress, 'total': total}
+        await self.queue.db.update_job(self.id, **fields)
+        await self.queue.render(self.id)
+
+
+class JobQueue:
+    """Persistent background job queue for long admin operations.
+
+    Jobs are stored in the jobs table and run by a small pool of asyncio
+    workers, off the update handlers that submitted them. Each job owns a
+    single progress message in the submitter's chat that is edited in
+    place, with an inline cancel button while it is queued or running.
+    Jobs left queued or running by a restart are picked up again on start.
+    """
+
+    def __init__(self, bot: Bot, db: AsyncDatabase, workers=2, progress_interval=2.0):
+        self.bot = bot
+        self.db = db
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.handlers = {}
+        self.cancelled = set()
+        self.queue = asyncio.Queue()
+        self._tasks = []
+
+    def register(self, kind, label):
+        """Decorator registering `async def handler(job) -> str` for a job kind."""
+        def decorator(handler):
+            self.handlers[kind] = (label, handler)
+            return handler
+        return decorator
+
+    async def submit(self, kind, payload, chat_id):
+        job_id = await self.db.create_job(kind, json.dumps(payload), chat_id)
+        if job_id is None:
+            return None
+        message = await self.bot.send_message(chat_id, self.format_job(job_id, kind, 'queued', 0, None),
+                                              reply_markup=job_keyboard(job_id))
+        await self.db.update_job(job_id, message_id=message.message_id)
+        self.queue.put_nowait(job_id)
+        return job_id
+
+    async def cancel(self, job_id):
+        job = await self.db.get_job(job_id)
+        if not job or job[3] not in ('queued', 'running'):
+            return False
+        self.cancelled.add(job_id)
+        if job[3] == 'queued':
+            await self.db.update_job(job_id, status='cancelled')
+            await self.render(job_id)
+        return True
+
+    def label(self, kind):
+        return self.handlers.get(kind, (kind,))[0]
+
+    def format_job(self, job_id, kind, status, progress, total, result=None):
+        text = f"🗂️ Vazifa #{job_id}: {self.label(kind)}\nHolati: {JOB_STATUS_LABELS.get(status, status)}"
+        if total:
+            text += f"\nJarayon: {progress}/{total}"
+        if result:
+            text += f"\n\n{result}"
+        return text
+
+    async def render(self, job_id):
+        job = await self.db.get_job(job_id)
+        if not job or not job[8]:
+            return
+        _, kind, _, status, progress, total, result, chat_id, message_id = job
+        try:
+            await self.bot.edit_message_text(
+                self.format_job(job_id, kind, status, progress, total, result),
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=job_keyboard(job_id) if status in ('queued', 'running') else None
+            )
+        except Exception as e:
+            logging.error(f"Error updating progress message of job {job_id}: {e}")
+
+    async def _run_job(self, job_id):
+        job = await self.db.get_job(job_id)
+        if not job or job[3] not in ('queued', 'running'):
+            return
+        _, kind, payload, _, _, _, _, chat_id, message_id = job
+        if kind not in self.handlers:
+            await self.db.update_job(job_id, status='failed', result=f"Noma'lum vazifa turi: {kind}")
+            return
+
+        await self.db.update_job(job_id, status='running')
+        await self.render(job_id)
+        try:
+            result = await self.handlers[kind][1](Job(self, job_id, json.loads(payload or "{}"), chat_id, message_id))
+            status = 'cancelled' if job_id in self.cancelled else 'done'
+        except Exception as e:
+            logging.error(f"Job {job_id} ({kind}) failed: {e}")
+            result, status = str(e), 'failed'
+        self.cancelled.discard(job_id)
+        await self.db.update_job(job_id, status=status, result=result)
+        await self.render(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run_job(job_id)
+            finally:
+                self.queue.task_done()
+
+    async def start(self):
+        for job_id in await self.db.get_unfinished_jobs():
+            self.queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        # Running jobs stay 'running' in the database and are resumed on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
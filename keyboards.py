@@ -1,100 +1,131 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+from i18n import i18n
+from menu import MAIN_MENU, ADMIN_MENU, CANCEL_MENU, CANCEL
+
 # --- User Keyboards ---
+# Every user keyboard is built once per locale; handlers pick one with keyboards[locale]
 
-# Main Menu Keyboard
-main_menu_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="Asosiy menyu 🏠")],
-        [KeyboardButton(text="Rasm yuborish 🖼️"), KeyboardButton(text="Video yuborish 🎬")],
-        [KeyboardButton(text="Matnli xabar yuborish 📝"), KeyboardButton(text="Fayl yuborish 📁")],
-        [KeyboardButton(text="Rezume yuklash 📄"), KeyboardButton(text="So'rov yuborish (savol) ❓")],
-        [KeyboardButton(text="Biz bilan bog'lanish 📞"), KeyboardButton(text="Taklif yuborish 💡")],
-        [KeyboardButton(text="Fikr bildirish 💬"), KeyboardButton(text="Ko'p beriladigan savollar ❓")],
-        [KeyboardButton(text="Shaxsiy ma'lumotlarim 👤"), KeyboardButton(text="Statistika 📊")],
-        [KeyboardButton(text="Rasmlar galereyasi 🏞️"), KeyboardButton(text="Video galereyasi 🎥")],
-        [KeyboardButton(text="So'ngi yangiliklar 📰"), KeyboardButton(text="Telegram kanalingizga o'tish 🔗")],
-        [KeyboardButton(text="Referal tizimi 🤝"), KeyboardButton(text="Promokod kiritish 🎁")],
-        [KeyboardButton(text="Narxlar ro'yxati 💰"), KeyboardButton(text="Bepul xizmatlar ✅")],
-        [KeyboardButton(text="Pullik xizmatlar 💳"), KeyboardButton(text="Adminga yozish ✍️")],
-        [KeyboardButton(text="Shikoyat yuborish 🚨"), KeyboardButton(text="Tanishuv so'rovi yuborish 👋")],
-        [KeyboardButton(text="Lokatsiya yuborish 📍"), KeyboardButton(text="Kontakt yuborish 📱")],
-        [KeyboardButton(text="Ilova bog'lash / qo'llab-quvvatlash 🛠️")]
-    ],
-    resize_keyboard=True,
-    one_time_keyboard=False
-)
+# Main Menu Keyboards (buttons are declared in menu.py)
+main_menu_keyboards = MAIN_MENU.keyboards
 
-# Keyboard for sharing contact
-contact_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="Telefon raqamimni ulashish 📱", request_contact=True)],
-        [KeyboardButton(text="Bekor qilish ❌")]
-    ],
-    resize_keyboard=True,
-    one_time_keyboard=True
-)
+# Keyboards for sharing contact
+contact_keyboards = {
+    locale: ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=i18n.get(locale, "menu.share_contact"), request_contact=True)],
+            [KeyboardButton(text=i18n.get(locale, CANCEL.label))]
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=True
+    )
+    for locale in i18n.locales
+}
 
-# Keyboard for sharing location
-location_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="Manzilimni ulashish 📍", request_location=True)],
-        [KeyboardButton(text="Bekor qilish ❌")]
-    ],
-    resize_keyboard=True,
-    one_time_keyboard=True
-)
+# Keyboards for sharing location
+location_keyboards = {
+    locale: ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=i18n.get(locale, "menu.share_location"), request_location=True)],
+            [KeyboardButton(text=i18n.get(locale, CANCEL.label))]
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=True
+    )
+    for locale in i18n.locales
+}
 
-# Cancel keyboard
-cancel_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="Bekor qilish ❌")]
-    ],
-    resize_keyboard=True,
-    one_time_keyboard=True
-)
+# Cancel keyboards
+cancel_keyboards = CANCEL_MENU.keyboards
 
-# Inline keyboard for "Ortga" and "Bosh menyu"
-back_to_main_menu_keyboard = InlineKeyboardMarkup(
-    inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🔙 Ortga", callback_data="back"),
-            InlineKeyboardButton(text="🔝 Bosh menyu", callback_data="main_menu")
+# Inline keyboards for "Ortga" and "Bosh menyu"
+back_to_main_menu_keyboards = {
+    locale: InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text=i18n.get(locale, "menu.back"), callback_data="back"),
+                InlineKeyboardButton(text=i18n.get(locale, "menu.main_menu"), callback_data="main_menu")
+            ]
         ]
-    ]
-)
+    )
+    for locale in i18n.locales
+}
+
+# FAQ Inline Keyboards
+faq_keyboards = {
+    locale: InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=i18n.get(locale, "faq.how_works.button"), callback_data="faq_how_works")],
+            [InlineKeyboardButton(text=i18n.get(locale, "faq.services.button"), callback_data="faq_services")],
+            [InlineKeyboardButton(text=i18n.get(locale, "faq.support.button"), callback_data="faq_support")],
+            [InlineKeyboardButton(text=i18n.get(locale, "menu.back"), callback_data="main_menu")]
+        ]
+    )
+    for locale in i18n.locales
+}
+
+# Default-locale keyboards, used by the (untranslated) admin panel
+main_menu_keyboard = main_menu_keyboards[i18n.default_locale]
+cancel_keyboard = cancel_keyboards[i18n.default_locale]
 
 # --- Admin Keyboards ---
 
-# Admin Menu Keyboard
-admin_menu_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="Barcha foydalanuvchilarni ko'rish 👥")],
-        [KeyboardButton(text="Har bir foydalanuvchiga yozish ✍️")],
-        [KeyboardButton(text="Foydalanuvchi statistikasi 📊")],
-        [KeyboardButton(text="Xabar yuborish (broadcast) 📢")],
-        [KeyboardButton(text="Tugma yaratish (custom keyboard) ⌨️")],
-        [KeyboardButton(text="Rasm/video/fayl joylash ➕")],
-        [KeyboardButton(text="Promokodlar yaratish 🎫")],
-        [KeyboardButton(text="To'lovlar nazorati (optional) 💳")],
-        [KeyboardButton(text="Fikrlar ko'rish 👁️")],
-        [KeyboardButton(text="Takliflar ko'rish 💡")],
-        [KeyboardButton(text="Shikoyatlar ko'rish 🚨")],
-        [KeyboardButton(text="Savollar ko'rish ❓")],
-        [KeyboardButton(text="Xatoliklarni ko'rish (logs) 📜")],
-        [KeyboardButton(text="Admindan chiqish 🚪")],
-        [KeyboardButton(text="Asosiy menyu 🏠")]
-    ],
-    resize_keyboard=True,
-    one_time_keyboard=False
-)
+# Admin Menu Keyboard (buttons are declared in menu.py)
+admin_menu_keyboard = ADMIN_MENU.keyboard
+
+
+def pagination_keyboard(kind, prev_cursor=None, next_cursor=None):
+    """Inline prev/next buttons for a keyset-paginated admin list.
+
+    Cursors are (timestamp, id) pairs; callback data is "pg|kind|n|timestamp|id".
+    """
+    buttons = []
+    if prev_cursor:
+        buttons.append(InlineKeyboardButton(text="⬅️ Oldingi", callback_data=f"pg|{kind}|p|{prev_cursor[0]}|{prev_cursor[1]}"))
+    if next_cursor:
+        buttons.append(InlineKeyboardButton(text="Keyingi ➡️", callback_data=f"pg|{kind}|n|{next_cursor[0]}|{next_cursor[1]}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+
+
+def search_keyboard(page, has_next=False):
+    """Inline prev/next buttons for admin search results; callback data is "sr|page"."""
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton(text="⬅️ Oldingi", callback_data=f"sr|{page - 1}"))
+    if has_next:
+        buttons.append(InlineKeyboardButton(text="Keyingi ➡️", callback_data=f"sr|{page + 1}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+
+
+def job_keyboard(job_id):
+    """Inline cancel button attached to a background job's progress message."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="❌ Bekor qilish", callback_data=f"job_cancel:{job_id}")]]
+    )
+
+
+def ticket_keyboard(ticket_ids):
+    """Claim and close buttons, one row per ticket; callback data is "tk|claim|id" or "tk|close|id"."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text=f"✋ #{ticket_id} Olish", callback_data=f"tk|claim|{ticket_id}"),
+            InlineKeyboardButton(text=f"✅ #{ticket_id} Yopish", callback_data=f"tk|close|{ticket_id}")
+        ]
+        for ticket_id in ticket_ids
+    ])
+
+
+# Label (in any locale) -> default-locale label of the reply keyboard buttons,
+# counted as button presses in the analytics rollups
+BUTTON_TEXTS = {**MAIN_MENU.canonical, **ADMIN_MENU.canonical, **CANCEL_MENU.canonical}
 
-# FAQ Inline Keyboard
-faq_keyboard = InlineKeyboardMarkup(
-    inline_keyboard=[
-        [InlineKeyboardButton(text="Bot qanday ishlaydi?", callback_data="faq_how_works")],
-        [InlineKeyboardButton(text="Qanday xizmatlar mavjud?", callback_data="faq_services")],
-        [InlineKeyboardButton(text="Qo'llab-quvvatlash", callback_data="faq_support")],
-        [InlineKeyboardButton(text="🔙 Ortga", callback_data="main_menu")]
-    ]
+# Keyboards that never change; the bot session sends them as pre-serialised JSON
+STATIC_MARKUPS = (
+    *main_menu_keyboards.values(),
+    admin_menu_keyboard,
+    *cancel_keyboards.values(),
+    *contact_keyboards.values(),
+    *location_keyboards.values(),
+    *back_to_main_menu_keyboards.values(),
+    *faq_keyboards.values(),
 )
@@ -1,24 +1,56 @@
 import asyncio
+import html
 import logging
 import os
+from aiohttp import web
 from aiogram import Bot, Dispatcher, Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
-from aiogram.filters import CommandStart, Command
+from aiogram.types import Message, CallbackQuery, FSInputFile, User
+from aiogram.filters import CommandStart, Command, CommandObject
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.storage.memory import MemoryStorage
-
-from config import BOT_TOKEN, ADMIN_ID, ADMIN_PASSWORD, DB_NAME, MEDIA_DIR, CHANNEL_ID
-from database import Database
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import (
+    BOT_TOKEN, ADMIN_IDS, ADMIN_PASSWORD_HASH, ADMIN_SESSION_TTL, DB_NAME, MEDIA_DIR, CHANNEL_ID, DB_PROFILE, DB_MAINTENANCE_INTERVAL,
+    MESSAGE_LOG_BATCH_SIZE, MESSAGE_LOG_FLUSH_INTERVAL, STATS_CACHE_TTL, USER_CACHE_SIZE,
+    BROADCAST_WORKERS, BROADCAST_RATE_LIMIT, BROADCAST_PER_CHAT_INTERVAL, BROADCAST_MAX_RETRIES,
+    ADMIN_PAGE_SIZE, SEARCH_MAX_RESULTS, USER_UPSERT_FLUSH_INTERVAL, USER_UPSERT_BATCH_SIZE, USER_SEEN_CACHE_SIZE,
+    FSM_FLUSH_INTERVAL, FSM_CACHE_TTL, FSM_STATE_TTL, FSM_MAX_CACHED,
+    RUN_MODE, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    UPDATE_MAX_CONCURRENCY, JOB_WORKERS, JOB_PROGRESS_INTERVAL, MEDIA_GROUP_WINDOW,
+    MEDIA_ARCHIVE_ENABLED, MEDIA_ARCHIVE_WORKERS, MEDIA_ARCHIVE_QUEUE_SIZE, ADMIN_DIGEST_INTERVAL,
+    MESSAGE_RETENTION_DAYS, MESSAGE_ARCHIVE_DIR, RETENTION_INTERVAL, RETENTION_CHUNK_SIZE, RETENTION_VACUUM_PAGES,
+    ADMIN_STATS_DAYS, TICKET_ASSIGNMENT
+)
+from database import AsyncDatabase
+from admin_sessions import AdminSessionManager
+from broadcast import BroadcastEngine
+from jobs import JobQueue, JOB_STATUS_LABELS
+from media_archive import MediaArchiver
+from media_groups import MediaGroupCollector
+from retention import MessageRetention
+from tickets import TicketDispatcher
+from middlewares import UserUpsertMiddleware, UpdateSchedulerMiddleware, LocaleMiddleware
+from session import StaticMarkupSession
+from storage import SQLiteStorage
+from text_router import TextCommandRouter
+from i18n import i18n
+from menu import MAIN_MENU, ADMIN_MENU, CANCEL_MENU, HOME, CANCEL
 from keyboards import (
     main_menu_keyboard,
-    contact_keyboard,
-    location_keyboard,
-    back_to_main_menu_keyboard,
+    main_menu_keyboards,
+    contact_keyboards,
+    location_keyboards,
     admin_menu_keyboard,
     cancel_keyboard,
-    faq_keyboard
+    cancel_keyboards,
+    faq_keyboards,
+    pagination_keyboard,
+    search_keyboard,
+    ticket_keyboard,
+    BUTTON_TEXTS,
+    STATIC_MARKUPS
 )
 from states import UserStates, AdminStates
 
@@ -28,49 +60,144 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Initialize bot and dispatcher
 bot = Bot(
     token=BOT_TOKEN,
+    session=StaticMarkupSession(static_markups=STATIC_MARKUPS),
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 
-storage = MemoryStorage()
+db = AsyncDatabase(
+    DB_NAME,
+    log_batch_size=MESSAGE_LOG_BATCH_SIZE,
+    log_flush_interval=MESSAGE_LOG_FLUSH_INTERVAL,
+    stats_cache_ttl=STATS_CACHE_TTL,
+    profile=DB_PROFILE,
+    user_cache_size=USER_CACHE_SIZE,
+    button_texts=BUTTON_TEXTS
+)
+storage = SQLiteStorage(
+    db,
+    flush_interval=FSM_FLUSH_INTERVAL,
+    cache_ttl=FSM_CACHE_TTL,
+    state_ttl=FSM_STATE_TTL,
+    max_cached=FSM_MAX_CACHED
+)
 dp = Dispatcher(storage=storage)
 router = Router()
-db = Database(DB_NAME)
+# Keyboard buttons: resolved with one dict lookup, before the FSM state handlers in `router`
+text_commands = TextCommandRouter(name="text_commands")
+broadcast_engine = BroadcastEngine(
+    bot, db,
+    workers=BROADCAST_WORKERS,
+    rate=BROADCAST_RATE_LIMIT,
+    per_chat_interval=BROADCAST_PER_CHAT_INTERVAL,
+    max_retries=BROADCAST_MAX_RETRIES
+)
+admin_sessions = AdminSessionManager(db, ADMIN_IDS, ADMIN_PASSWORD_HASH, ttl=ADMIN_SESSION_TTL)
+job_queue = JobQueue(bot, db, workers=JOB_WORKERS, progress_interval=JOB_PROGRESS_INTERVAL)
+tickets = TicketDispatcher(bot, db, ADMIN_IDS, strategy=TICKET_ASSIGNMENT, digest_interval=ADMIN_DIGEST_INTERVAL)
+media_archiver = MediaArchiver(
+    bot, db, MEDIA_DIR,
+    workers=MEDIA_ARCHIVE_WORKERS,
+    queue_size=MEDIA_ARCHIVE_QUEUE_SIZE
+) if MEDIA_ARCHIVE_ENABLED else None
+message_retention = MessageRetention(
+    db, MESSAGE_RETENTION_DAYS,
+    chunk_size=RETENTION_CHUNK_SIZE,
+    archive_dir=MESSAGE_ARCHIVE_DIR,
+    vacuum_pages=RETENTION_VACUUM_PAGES,
+    active_users_days=ADMIN_STATS_DAYS
+)
+locale_middleware = LocaleMiddleware(i18n)
+update_scheduler_middleware = UpdateSchedulerMiddleware(max_concurrency=UPDATE_MAX_CONCURRENCY)
+user_upsert_middleware = UserUpsertMiddleware(
+    db,
+    flush_interval=USER_UPSERT_FLUSH_INTERVAL,
+    batch_size=USER_UPSERT_BATCH_SIZE,
+    seen_cache_size=USER_SEEN_CACHE_SIZE
+)
 
 
 # --- Helper Functions ---
 
+background_tasks = set()
+
+
+def run_in_background(coro):
+    """Run a long job (e.g. a broadcast) outside the update handler that started it."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
 def is_admin(user_id: int) -> bool:
-    return user_id == ADMIN_ID and db.is_admin_logged_in(user_id)
+    return admin_sessions.is_admin(user_id)
 
 
-async def send_to_admin(message_text: str, from_user_id: int = None):
-    """Send message to admin"""
-    try:
-        if from_user_id:
-            user_data = db.get_user(from_user_id)
-            if user_data:
-                username = user_data[2] or "Mavjud emas"
-                first_name = user_data[3] or "Mavjud emas"
-                text = f"<b>Yangi xabar:</b>\n\n{message_text}\n\n<b>Yuboruvchi:</b>\n👤 {first_name}\n🆔 @{username}\n🔢 ID: {from_user_id}"
-            else:
-                text = f"<b>Yangi xabar:</b>\n\n{message_text}\n\n<b>Yuboruvchi ID:</b> {from_user_id}"
-        else:
-            text = message_text
+async def send_to_admin(kind: str, message_text: str, from_user: User):
+    """Open a ticket for one of the admins and queue its notification (sent in digests, see AdminNotifier)"""
+    await tickets.submit(kind, message_text, from_user)
+
+
+def media_message_row(message: Message) -> tuple:
+    """(message_text, message_type, file_id) of a photo, video or document message for the messages log."""
+    if message.photo:
+        return message.caption or "Rasm", 'photo', message.photo[-1].file_id
+    if message.video:
+        return message.caption or "Video", 'video', message.video.file_id
+    return message.document.file_name or "Fayl", 'document', message.document.file_id
+
+
+def archive_media(message: Message):
+    """Queue the file of a photo, video or document message for the local media archive, if enabled."""
+    if media_archiver is None:
+        return
+    media = message.photo[-1] if message.photo else message.video or message.document
+    media_archiver.submit(media.file_id, media.file_unique_id)
+
+
+async def process_media_group(messages: list):
+    """Handle a whole album at once: one DB transaction, one admin notification and one reply."""
+    first = messages[0]
+    user_id = first.from_user.id
+    rows = [(user_id, *media_message_row(message)) for message in messages]
+    await db.add_messages(rows)
+    for message in messages:
+        archive_media(message)
+
+    caption = next((message.caption for message in messages if message.caption), None) or "Mavjud emas"
+    await tickets.submit_media_group(
+        messages,
+        [(message_type, file_id) for _, _, message_type, file_id in rows],
+        f"Yangi albom yuborildi ({len(messages)} ta fayl). Caption: {caption}"
+    )
+
+    # Collected outside the dispatcher, so the locale is resolved here
+    locale = i18n.resolve(first.from_user.language_code)
+    await first.answer(i18n.get(locale, "album.received", count=len(messages)),
+                       reply_markup=main_menu_keyboards[locale])
+
+
+media_group_collector = MediaGroupCollector(process_media_group, window=MEDIA_GROUP_WINDOW)
+
 
-        await bot.send_message(ADMIN_ID, text)
-        return True
-    except Exception as e:
-        logging.error(f"Error sending message to admin: {e}")
-        return False
+def format_broadcast_result(stats: dict) -> str:
+    success_count = stats.get('sent', 0)
+    fail_count = stats.get('failed', 0)
+    return (
+        f"<b>Broadcast natijasi:</b>\n\n"
+        f"✅ Muvaffaqiyatli: {success_count}\n"
+        f"❌ Muvaffaqiyatsiz: {fail_count}\n"
+        f"📊 Jami: {success_count + fail_count}"
+    )
 
 
 # --- Start and Basic Handlers ---
 
 @router.message(CommandStart())
-async def start_command(message: Message, state: FSMContext):
+async def start_command(message: Message, state: FSMContext, locale: str):
     await state.clear()
     user = message.from_user
-    added = db.add_user(
+    added = await db.add_user(
         telegram_id=user.id,
         username=user.username,
         first_name=user.first_name,
@@ -79,355 +206,359 @@ async def start_command(message: Message, state: FSMContext):
         language_code=user.language_code
     )
 
-    welcome_text = f"Assalomu alaykum, {user.full_name}! 🎉\n\n"
+    welcome_text = i18n.get(locale, "start.greeting", name=user.full_name)
     if added:
-        welcome_text += "Botimizga xush kelibsiz!\n"
+        welcome_text += i18n.get(locale, "start.welcome_new")
     else:
-        welcome_text += "Qaytganingizdan xursandmiz!\n"
+        welcome_text += i18n.get(locale, "start.welcome_back")
 
-    welcome_text += "Sizga qanday yordam bera olaman? Quyidagi tugmalardan birini tanlang:"
+    welcome_text += i18n.get(locale, "start.choose")
 
-    await message.answer(welcome_text, reply_markup=main_menu_keyboard)
-    db.add_message(user_id=user.id, message_text=message.text, message_type='text')
+    await message.answer(welcome_text, reply_markup=main_menu_keyboards[locale])
+    await db.add_message(user_id=user.id, message_text=message.text, message_type='text')
 
 
-@router.message(F.text == "Asosiy menyu 🏠")
-async def main_menu_handler(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU[HOME.key])
+async def main_menu_handler(message: Message, state: FSMContext, locale: str):
     await state.clear()
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Asosiy menyu:", reply_markup=main_menu_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "main_menu"), reply_markup=main_menu_keyboards[locale])
 
 
-@router.message(F.text == "Bekor qilish ❌")
-async def cancel_handler(message: Message, state: FSMContext):
+@text_commands.text(*CANCEL_MENU[CANCEL.key])
+async def cancel_handler(message: Message, state: FSMContext, locale: str):
     await state.clear()
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Amal bekor qilindi. Asosiy menyuga qaytdingiz.", reply_markup=main_menu_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "cancelled"), reply_markup=main_menu_keyboards[locale])
 
 
 # --- User Message Handlers ---
 
-@router.message(F.text == "Matnli xabar yuborish 📝")
-async def send_text_message_prompt(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["text_message"])
+async def send_text_message_prompt(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, yubormoqchi bo'lgan matningizni kiriting:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "text_message.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_text_message)
 
 
 @router.message(UserStates.waiting_for_text_message)
-async def process_text_message(message: Message, state: FSMContext):
+async def process_text_message(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
 
     # Send to admin
-    await send_to_admin(f"Matnli xabar: {message.text}", user_id)
+    await send_to_admin('text', f"Matnli xabar: {message.text}", message.from_user)
 
-    await message.answer("Matnli xabaringiz qabul qilindi va adminga yuborildi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "text_message.received"), reply_markup=main_menu_keyboards[locale])
     await state.clear()
 
 
-@router.message(F.text == "Rasm yuborish 🖼️")
-async def request_photo(message: Message):
+@text_commands.text(*MAIN_MENU["photo"])
+async def request_photo(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, rasm yuboring:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "photo.prompt"), reply_markup=cancel_keyboards[locale])
 
 
 @router.message(F.photo)
-async def photo_message_handler(message: Message):
+async def photo_message_handler(message: Message, locale: str):
+    if message.media_group_id:
+        media_group_collector.add(message)
+        return
+
     user_id = message.from_user.id
     file_id = message.photo[-1].file_id
     caption = message.caption or "Rasm"
 
-    db.add_message(user_id=user_id, message_text=caption, message_type='photo', file_id=file_id)
+    await db.add_message(user_id=user_id, message_text=caption, message_type='photo', file_id=file_id)
+    archive_media(message)
 
-    # Forward to admin
-    try:
-        await bot.forward_message(ADMIN_ID, message.chat.id, message.message_id)
-        await send_to_admin(f"Yangi rasm yuborildi. Caption: {caption}", user_id)
-    except Exception as e:
-        logging.error(f"Error forwarding photo to admin: {e}")
+    # Copy to admin with the sender info in the caption
+    await tickets.submit_media('photo', message, f"Yangi rasm yuborildi. Caption: {caption}")
 
-    await message.answer("Rasm qabul qilindi va adminga yuborildi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "photo.received"), reply_markup=main_menu_keyboards[locale])
 
 
-@router.message(F.text == "Video yuborish 🎬")
-async def request_video(message: Message):
+@text_commands.text(*MAIN_MENU["video"])
+async def request_video(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, video yuboring:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "video.prompt"), reply_markup=cancel_keyboards[locale])
 
 
 @router.message(F.video)
-async def video_message_handler(message: Message):
+async def video_message_handler(message: Message, locale: str):
+    if message.media_group_id:
+        media_group_collector.add(message)
+        return
+
     user_id = message.from_user.id
     file_id = message.video.file_id
     caption = message.caption or "Video"
 
-    db.add_message(user_id=user_id, message_text=caption, message_type='video', file_id=file_id)
+    await db.add_message(user_id=user_id, message_text=caption, message_type='video', file_id=file_id)
+    archive_media(message)
 
-    # Forward to admin
-    try:
-        await bot.forward_message(ADMIN_ID, message.chat.id, message.message_id)
-        await send_to_admin(f"Yangi video yuborildi. Caption: {caption}", user_id)
-    except Exception as e:
-        logging.error(f"Error forwarding video to admin: {e}")
+    # Copy to admin with the sender info in the caption
+    await tickets.submit_media('video', message, f"Yangi video yuborildi. Caption: {caption}")
 
-    await message.answer("Video qabul qilindi va adminga yuborildi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "video.received"), reply_markup=main_menu_keyboards[locale])
 
 
-@router.message(F.text == "Fayl yuborish 📁")
-async def request_document(message: Message):
+@text_commands.text(*MAIN_MENU["document"])
+async def request_document(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, fayl yuboring:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "document.prompt"), reply_markup=cancel_keyboards[locale])
 
 
 @router.message(F.document)
-async def document_message_handler(message: Message):
+async def document_message_handler(message: Message, locale: str):
+    if message.media_group_id:
+        media_group_collector.add(message)
+        return
+
     user_id = message.from_user.id
     file_id = message.document.file_id
     file_name = message.document.file_name or "Fayl"
 
-    db.add_message(user_id=user_id, message_text=file_name, message_type='document', file_id=file_id)
+    await db.add_message(user_id=user_id, message_text=file_name, message_type='document', file_id=file_id)
+    archive_media(message)
 
-    # Forward to admin
-    try:
-        await bot.forward_message(ADMIN_ID, message.chat.id, message.message_id)
-        await send_to_admin(f"Yangi fayl yuborildi: {file_name}", user_id)
-    except Exception as e:
-        logging.error(f"Error forwarding document to admin: {e}")
+    # Copy to admin with the sender info in the caption
+    await tickets.submit_media('document', message, f"Yangi fayl yuborildi: {file_name}")
 
-    await message.answer("Fayl qabul qilindi va adminga yuborildi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "document.received"), reply_markup=main_menu_keyboards[locale])
 
 
 # --- Contact and Location Handlers ---
 
-@router.message(F.text == "Kontakt yuborish 📱")
-async def request_contact_handler(message: Message):
+@text_commands.text(*MAIN_MENU["contact"])
+async def request_contact_handler(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Telefon raqamingizni ulashish uchun quyidagi tugmani bosing:", reply_markup=contact_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "contact.prompt"), reply_markup=contact_keyboards[locale])
 
 
 @router.message(F.contact)
-async def contact_shared_handler(message: Message):
+async def contact_shared_handler(message: Message, locale: str):
     user_id = message.from_user.id
     contact = message.contact
     contact_info = f"Kontakt: {contact.phone_number}"
 
-    db.add_message(user_id=user_id, message_text=contact_info, message_type='contact')
+    await db.add_message(user_id=user_id, message_text=contact_info, message_type='contact')
 
     # Send to admin
-    await send_to_admin(f"Yangi kontakt: {contact.first_name} {contact.last_name or ''} - {contact.phone_number}",
-                        user_id)
+    await send_to_admin(
+        'contact', f"Yangi kontakt: {contact.first_name} {contact.last_name or ''} - {contact.phone_number}",
+        message.from_user
+    )
 
     await message.answer(
-        f"Rahmat, {contact.first_name} {contact.last_name or ''} ({contact.phone_number}) kontaktingiz qabul qilindi va adminga yuborildi! ✅",
-        reply_markup=main_menu_keyboard
+        i18n.get(locale, "contact.received", name=f"{contact.first_name} {contact.last_name or ''}",
+                 phone=contact.phone_number),
+        reply_markup=main_menu_keyboards[locale]
     )
 
 
-@router.message(F.text == "Lokatsiya yuborish 📍")
-async def request_location_handler(message: Message):
+@text_commands.text(*MAIN_MENU["location"])
+async def request_location_handler(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Manzilingizni ulashish uchun quyidagi tugmani bosing:", reply_markup=location_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "location.prompt"), reply_markup=location_keyboards[locale])
 
 
 @router.message(F.location)
-async def location_shared_handler(message: Message):
+async def location_shared_handler(message: Message, locale: str):
     user_id = message.from_user.id
     location = message.location
     location_info = f"Lokatsiya: Lat {location.latitude}, Lon {location.longitude}"
 
-    db.add_message(user_id=user_id, message_text=location_info, message_type='location')
+    await db.add_message(user_id=user_id, message_text=location_info, message_type='location')
 
     # Send to admin
-    await send_to_admin(f"Yangi lokatsiya: Lat {location.latitude}, Lon {location.longitude}", user_id)
+    await send_to_admin('location', f"Yangi lokatsiya: Lat {location.latitude}, Lon {location.longitude}",
+                        message.from_user)
 
-    await message.answer("Rahmat, manzilingiz qabul qilindi va adminga yuborildi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "location.received"), reply_markup=main_menu_keyboards[locale])
 
 
 # --- Feedback, Suggestions, Complaints, Questions ---
 
-@router.message(F.text == "Fikr bildirish 💬")
-async def request_feedback(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["feedback"])
+async def request_feedback(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, fikringizni yozing:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "feedback.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_feedback)
 
 
 @router.message(UserStates.waiting_for_feedback)
-async def process_feedback(message: Message, state: FSMContext):
+async def process_feedback(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
     feedback_text = message.text
 
-    db.add_feedback(user_id, feedback_text)
-    await send_to_admin(f"Yangi fikr: {feedback_text}", user_id)
+    await db.add_feedback(user_id, feedback_text)
+    await send_to_admin('feedback', f"Yangi fikr: {feedback_text}", message.from_user)
 
-    await message.answer("Fikringiz qabul qilindi! Rahmat! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "feedback.received"), reply_markup=main_menu_keyboards[locale])
     await state.clear()
 
 
-@router.message(F.text == "Taklif yuborish 💡")
-async def request_suggestion(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["suggestion"])
+async def request_suggestion(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, taklifingizni yozing:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "suggestion.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_suggestion)
 
 
 @router.message(UserStates.waiting_for_suggestion)
-async def process_suggestion(message: Message, state: FSMContext):
+async def process_suggestion(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
     suggestion_text = message.text
 
-    db.add_suggestion(user_id, suggestion_text)
-    await send_to_admin(f"Yangi taklif: {suggestion_text}", user_id)
+    await db.add_suggestion(user_id, suggestion_text)
+    await send_to_admin('suggestion', f"Yangi taklif: {suggestion_text}", message.from_user)
 
-    await message.answer("Taklifingiz qabul qilindi! Rahmat! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "suggestion.received"), reply_markup=main_menu_keyboards[locale])
     await state.clear()
 
 
-@router.message(F.text == "Shikoyat yuborish 🚨")
-async def request_complaint(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["complaint"])
+async def request_complaint(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, shikoyatingizni yozing:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "complaint.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_complaint)
 
 
 @router.message(UserStates.waiting_for_complaint)
-async def process_complaint(message: Message, state: FSMContext):
+async def process_complaint(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
     complaint_text = message.text
 
-    db.add_complaint(user_id, complaint_text)
-    await send_to_admin(f"Yangi shikoyat: {complaint_text}", user_id)
+    await db.add_complaint(user_id, complaint_text)
+    await send_to_admin('complaint', f"Yangi shikoyat: {complaint_text}", message.from_user)
 
-    await message.answer("Shikoyatingiz qabul qilindi va ko'rib chiqiladi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "complaint.received"), reply_markup=main_menu_keyboards[locale])
     await state.clear()
 
 
-@router.message(F.text == "So'rov yuborish (savol) ❓")
-async def request_question(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["question"])
+async def request_question(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, savolingizni yozing:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "question.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_question)
 
 
 @router.message(UserStates.waiting_for_question)
-async def process_question(message: Message, state: FSMContext):
+async def process_question(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
     question_text = message.text
 
-    db.add_question(user_id, question_text)
-    await send_to_admin(f"Yangi savol: {question_text}", user_id)
+    await db.add_question(user_id, question_text)
+    await send_to_admin('question', f"Yangi savol: {question_text}", message.from_user)
 
-    await message.answer("Savolingiz qabul qilindi va tez orada javob beriladi! ✅", reply_markup=main_menu_keyboard)
+    await message.answer(i18n.get(locale, "question.received"), reply_markup=main_menu_keyboards[locale])
     await state.clear()
 
 
 # --- User Info and Stats ---
 
-@router.message(F.text == "Shaxsiy ma'lumotlarim 👤")
-async def show_personal_info(message: Message):
+@text_commands.text(*MAIN_MENU["personal_info"])
+async def show_personal_info(message: Message, locale: str):
     user_id = message.from_user.id
-    user_data = db.get_user(user_id)
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    user_data = await db.get_user(user_id)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
 
     if user_data:
         _, telegram_id, username, first_name, last_name, _, _, added_at = user_data
-        response = (
-            f"<b>Sizning ma'lumotlaringiz:</b>\n\n"
-            f"🆔 ID: <code>{telegram_id}</code>\n"
-            f"👤 Username: @{username or 'Mavjud emas'}\n"
-            f"📝 Ism: {first_name or 'Mavjud emas'}\n"
-            f"📝 Familiya: {last_name or 'Mavjud emas'}\n"
-            f"🗓️ Ro'yxatdan o'tgan sana: {added_at.split('.')[0]}"
+        unknown = i18n.get(locale, "unknown")
+        response = i18n.get(
+            locale, "personal_info.text",
+            telegram_id=telegram_id,
+            username=username or unknown,
+            first_name=first_name or unknown,
+            last_name=last_name or unknown,
+            added_at=added_at.split('.')[0]
         )
     else:
-        response = "Ma'lumotlaringiz topilmadi."
+        response = i18n.get(locale, "personal_info.not_found")
 
-    await message.answer(response, reply_markup=main_menu_keyboard)
+    await message.answer(response, reply_markup=main_menu_keyboards[locale])
 
 
-@router.message(F.text == "Statistika 📊")
-async def show_user_stats(message: Message):
+@text_commands.text(*MAIN_MENU["stats"])
+async def show_user_stats(message: Message, locale: str):
     user_id = message.from_user.id
-    total_users = len(db.get_all_users())
-    user_message_count = db.get_user_message_count(user_id)
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    total_users = await db.get_counter('users')
+    user_message_count = await db.get_user_message_count(user_id)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
 
-    response = (
-        f"<b>Bot statistikasi:</b>\n\n"
-        f"👥 Jami foydalanuvchilar: {total_users}\n"
-        f"💬 Siz yuborgan xabarlar soni: {user_message_count}"
-    )
-    await message.answer(response, reply_markup=main_menu_keyboard)
+    response = i18n.get(locale, "stats.text", total_users=total_users, message_count=user_message_count)
+    await message.answer(response, reply_markup=main_menu_keyboards[locale])
 
 
 # --- FAQ and Other Features ---
 
-@router.message(F.text == "Ko'p beriladigan savollar ❓")
-async def show_faq(message: Message):
+@text_commands.text(*MAIN_MENU["faq"])
+async def show_faq(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Ko'p beriladigan savollar:", reply_markup=faq_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "faq.title"), reply_markup=faq_keyboards[locale])
 
 
 @router.callback_query(F.data.startswith("faq_"))
-async def handle_faq_callback(callback: CallbackQuery):
+async def handle_faq_callback(callback: CallbackQuery, locale: str):
     data = callback.data
 
     if data == "faq_how_works":
-        text = "Bot qanday ishlaydi?\n\nBu bot orqali siz admin bilan bog'lanishingiz, rasm, video, fayl yuborishingiz va turli xil so'rovlar yuborishingiz mumkin."
+        text = i18n.get(locale, "faq.how_works.text")
     elif data == "faq_services":
-        text = "Qanday xizmatlar mavjud?\n\n• Rasm/video/fayl yuborish\n• Matnli xabar yuborish\n• Fikr bildirish\n• Taklif yuborish\n• Shikoyat yuborish\n• Savol berish"
+        text = i18n.get(locale, "faq.services.text")
     elif data == "faq_support":
-        text = "Qo'llab-quvvatlash\n\nAgar sizda qo'shimcha savollar bo'lsa, 'Adminga yozish' tugmasini bosing."
+        text = i18n.get(locale, "faq.support.text")
     else:
-        text = "Noma'lum savol."
+        text = i18n.get(locale, "faq.unknown")
 
-    await callback.message.edit_text(text, reply_markup=faq_keyboard)
+    await callback.message.edit_text(text, reply_markup=faq_keyboards[locale])
     await callback.answer()
 
 
-@router.message(F.text == "Promokod kiritish 🎁")
-async def request_promocode(message: Message, state: FSMContext):
+@text_commands.text(*MAIN_MENU["promocode"])
+async def request_promocode(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer("Iltimos, promokodni kiriting:", reply_markup=cancel_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "promocode.prompt"), reply_markup=cancel_keyboards[locale])
     await state.set_state(UserStates.waiting_for_promocode)
 
 
 @router.message(UserStates.waiting_for_promocode)
-async def process_promocode(message: Message, state: FSMContext):
+async def process_promocode(message: Message, state: FSMContext, locale: str):
     user_id = message.from_user.id
     promocode = message.text.strip()
 
-    promo_data = db.check_promocode(promocode)
+    promo_data = await db.check_promocode(promocode)
     if promo_data:
-        await message.answer(f"✅ Promokod '{promocode}' faollashtirildi!\n\n{promo_data[2]}",
-                             reply_markup=main_menu_keyboard)
-        await send_to_admin(f"Promokod ishlatildi: {promocode}", user_id)
+        await message.answer(i18n.get(locale, "promocode.activated", code=promocode, description=promo_data[2]),
+                             reply_markup=main_menu_keyboards[locale])
+        await send_to_admin('promocode', f"Promokod ishlatildi: {promocode}", message.from_user)
     else:
-        await message.answer("❌ Noto'g'ri promokod yoki promokod faol emas.", reply_markup=main_menu_keyboard)
+        await message.answer(i18n.get(locale, "promocode.invalid"), reply_markup=main_menu_keyboards[locale])
 
     await state.clear()
 
 
-@router.message(F.text == "Telegram kanalingizga o'tish 🔗")
-async def go_to_channel(message: Message):
+@text_commands.text(*MAIN_MENU["channel"])
+async def go_to_channel(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer(f"Bizning rasmiy kanalimiz: {CHANNEL_ID}", reply_markup=main_menu_keyboard)
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "channel", channel=CHANNEL_ID), reply_markup=main_menu_keyboards[locale])
 
 
 # --- Admin Authentication ---
@@ -435,13 +566,13 @@ async def go_to_channel(message: Message):
 @router.message(Command("admin"))
 async def admin_login_request(message: Message, state: FSMContext):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
 
-    if user_id != ADMIN_ID:
+    if user_id not in ADMIN_IDS:
         await message.answer("Siz admin emassiz. 🚫")
         return
 
-    if db.is_admin_logged_in(user_id):
+    if is_admin(user_id):
         await message.answer("Siz allaqachon admin panelida kirgansiz! 👑", reply_markup=admin_menu_keyboard)
         return
 
@@ -454,13 +585,13 @@ async def process_admin_password(message: Message, state: FSMContext):
     user_id = message.from_user.id
     password = message.text.strip()
 
-    if user_id != ADMIN_ID:
+    if user_id not in ADMIN_IDS:
         await message.answer("Siz admin emassiz. 🚫")
         await state.clear()
         return
 
-    if password == ADMIN_PASSWORD:
-        db.set_admin_session(user_id, True)
+    if await admin_sessions.check_password(password):
+        await admin_sessions.login(user_id)
         await message.answer("✅ Muvaffaqiyatli kirildi! Admin paneliga xush kelibsiz! 👑",
                              reply_markup=admin_menu_keyboard)
         await state.clear()
@@ -468,22 +599,86 @@ async def process_admin_password(message: Message, state: FSMContext):
         await message.answer("❌ Noto'g'ri parol. Qaytadan urinib ko'ring:", reply_markup=cancel_keyboard)
 
 
-@router.message(F.text == "Admindan chiqish 🚪")
+@text_commands.text(*ADMIN_MENU["logout"])
 async def admin_logout(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
-    if user_id != ADMIN_ID:
+    if user_id not in ADMIN_IDS:
         await message.answer("Siz admin emassiz. 🚫")
         return
 
-    db.set_admin_session(user_id, False)
+    await admin_sessions.logout(user_id)
     await state.clear()
     await message.answer("Admin paneldan chiqildi. Asosiy menyuga qaytdingiz.", reply_markup=main_menu_keyboard)
 
 
 # --- Admin Panel Handlers ---
 
-@router.message(F.text == "Barcha foydalanuvchilarni ko'rish 👥")
+ADMIN_PAGE_TITLES = {
+    'users': ("<b>Barcha foydalanuvchilar:</b>", "Hozircha hech qanday foydalanuvchi yo'q."),
+    'feedback': ("<b>Barcha fikrlar:</b>", "Hozircha hech qanday fikr yo'q."),
+    'suggestions': ("<b>Barcha takliflar:</b>", "Hozircha hech qanday taklif yo'q."),
+    'complaints': ("<b>Barcha shikoyatlar:</b>", "Hozircha hech qanday shikoyat yo'q."),
+    'questions': ("<b>Barcha savollar:</b>", "Hozircha hech qanday savol yo'q."),
+}
+ADMIN_PAGE_ICONS = {'feedback': "💬", 'suggestions': "💡", 'complaints': "🚨", 'questions': "❓"}
+ADMIN_PAGE_TEXT_LIMIT = 300
+
+
+def format_admin_row(kind: str, row: tuple) -> str:
+    if kind == 'users':
+        u_id, username, first_name, last_name, message_count, _, _ = row
+        return (
+            f"🆔 <code>{u_id}</code>\n"
+            f"👤 @{username or 'Mavjud emas'}\n"
+            f"📝 {html.escape(first_name or 'Mavjud emas')} {html.escape(last_name or '')}\n"
+            f"💬 Xabarlar: {message_count}\n"
+            f"{'─' * 20}\n"
+        )
+    text, first_name, username, timestamp, _ = row
+    if text and len(text) > ADMIN_PAGE_TEXT_LIMIT:
+        text = text[:ADMIN_PAGE_TEXT_LIMIT] + "…"
+    # Escape after truncating, so an entity is never cut in half
+    return (
+        f"👤 {html.escape(first_name or 'Mavjud emas')} (@{username or 'mavjud emas'})\n"
+        f"{ADMIN_PAGE_ICONS[kind]} {html.escape(text or '')}\n🕐 {timestamp}\n{'─' * 30}\n"
+    )
+
+
+async def render_admin_page(kind: str, cursor: tuple = None, direction: str = 'next'):
+    """Render one keyset page of an admin list as (text, inline keyboard)."""
+    rows, has_prev, has_next = await db.get_page(kind, cursor, direction, ADMIN_PAGE_SIZE)
+    title, empty_text = ADMIN_PAGE_TITLES[kind]
+    if not rows:
+        return empty_text, None
+
+    text = f"{title}\n\n" + "".join(format_admin_row(kind, row) for row in rows)
+    keyboard = pagination_keyboard(
+        kind,
+        prev_cursor=rows[0][-2:] if has_prev else None,
+        next_cursor=rows[-1][-2:] if has_next else None
+    )
+    return text, keyboard
+
+
+async def send_admin_page(message: Message, kind: str):
+    text, keyboard = await render_admin_page(kind)
+    await message.answer(text, reply_markup=keyboard or admin_menu_keyboard)
+
+
+@router.callback_query(F.data.startswith("pg|"))
+async def admin_page_callback(callback: CallbackQuery):
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫", show_alert=True)
+        return
+
+    _, kind, direction, timestamp, row_id = callback.data.split("|")
+    text, keyboard = await render_admin_page(kind, (timestamp, int(row_id)), 'next' if direction == 'n' else 'prev')
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@text_commands.text(*ADMIN_MENU["users"])
 async def show_all_users_admin(message: Message):
     user_id = message.from_user.id
 
@@ -491,31 +686,10 @@ async def show_all_users_admin(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    users = db.get_all_users()
-    if users:
-        response = "<b>Barcha foydalanuvchilar:</b>\n\n"
-        for i, (u_id, username, first_name, last_name) in enumerate(users, 1):
-            message_count = db.get_user_message_count(u_id)
-            response += (
-                f"{i}. 🆔 <code>{u_id}</code>\n"
-                f"👤 @{username or 'Mavjud emas'}\n"
-                f"📝 {first_name or 'Mavjud emas'} {last_name or ''}\n"
-                f"💬 Xabarlar: {message_count}\n"
-                f"{'─' * 20}\n"
-            )
-
-        # Split long messages
-        if len(response) > 4000:
-            parts = [response[i:i + 4000] for i in range(0, len(response), 4000)]
-            for part in parts:
-                await message.answer(part, reply_markup=admin_menu_keyboard)
-        else:
-            await message.answer(response, reply_markup=admin_menu_keyboard)
-    else:
-        await message.answer("Hozircha hech qanday foydalanuvchi yo'q.", reply_markup=admin_menu_keyboard)
+    await send_admin_page(message, 'users')
 
 
-@router.message(F.text == "Foydalanuvchi statistikasi 📊")
+@text_commands.text(*ADMIN_MENU["user_stats"])
 async def admin_user_stats(message: Message):
     user_id = message.from_user.id
 
@@ -523,12 +697,32 @@ async def admin_user_stats(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    total_users = len(db.get_all_users())
-    response = f"<b>Umumiy statistika:</b>\n\n👥 Jami foydalanuvchilar: {total_users}"
+    total_users = await db.get_counter('users')
+    dashboard = await db.get_dashboard(days=ADMIN_STATS_DAYS)
+    cache_stats = db.user_cache.stats()
+    response = (
+        f"<b>Umumiy statistika:</b>\n\n"
+        f"👥 Jami foydalanuvchilar: {total_users}\n"
+        f"✉️ Jami xabarlar: {dashboard['total_messages']}\n"
+        f"🗂️ Profil keshi: {cache_stats['size']}/{cache_stats['maxsize']}, "
+        f"hit {cache_stats['hit_rate']:.0%} ({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})\n"
+    )
+
+    response += f"\n<b>So'nggi {ADMIN_STATS_DAYS} kun (faol foydalanuvchilar / xabarlar):</b>\n"
+    response += "".join(f"📅 {day}: {active_users} / {total}\n" for day, active_users, total in dashboard['daily'])
+    if dashboard['types']:
+        response += "\n<b>Xabar turlari:</b>\n"
+        response += "".join(f"• {message_type}: {total}\n" for message_type, total in dashboard['types'])
+    if dashboard['hours']:
+        response += "\n<b>Eng faol soatlar (UTC):</b>\n"
+        response += "".join(f"🕐 {hour:02d}:00 — {total}\n" for hour, total in dashboard['hours'])
+    if dashboard['buttons']:
+        response += "\n<b>Eng ko'p bosilgan tugmalar:</b>\n"
+        response += "".join(f"• {text}: {total}\n" for text, total in dashboard['buttons'])
     await message.answer(response, reply_markup=admin_menu_keyboard)
 
 
-@router.message(F.text == "Xabar yuborish (broadcast) 📢")
+@text_commands.text(*ADMIN_MENU["broadcast"])
 async def request_broadcast_message(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
@@ -550,33 +744,242 @@ async def process_broadcast_message(message: Message, state: FSMContext):
         return
 
     broadcast_text = message.text
-    users = db.get_all_users()
+    broadcast_id = await db.create_broadcast(broadcast_text)
+    if broadcast_id is None:
+        await message.answer("❌ Broadcast yaratishda xatolik yuz berdi.", reply_markup=admin_menu_keyboard)
+        await state.clear()
+        return
 
-    success_count = 0
-    fail_count = 0
+    total = sum((await db.get_broadcast_stats(broadcast_id)).values())
+    await job_queue.submit('broadcast', {'broadcast_id': broadcast_id, 'text': broadcast_text, 'total': total}, user_id)
+    await state.clear()
 
-    await message.answer("Xabar yuborilmoqda...")
 
-    for user_data in users:
-        try:
-            await bot.send_message(user_data[0], broadcast_text)
-            success_count += 1
-        except Exception as e:
-            fail_count += 1
-            logging.error(f"Failed to send broadcast to {user_data[0]}: {e}")
+@job_queue.register('broadcast', "Broadcast 📢")
+async def broadcast_job(job):
+    broadcast_id, total = job.payload['broadcast_id'], job.payload['total']
+    # A resumed broadcast continues from the rows that are still pending
+    stats = await db.get_broadcast_stats(broadcast_id)
+    already_done = total - stats.get('pending', 0)
 
-    result_text = (
-        f"<b>Broadcast natijasi:</b>\n\n"
-        f"✅ Muvaffaqiyatli: {success_count}\n"
-        f"❌ Muvaffaqiyatsiz: {fail_count}\n"
-        f"📊 Jami: {success_count + fail_count}"
+    async def report_progress(done):
+        await job.report(already_done + done, total)
+
+    stats = await broadcast_engine.run(
+        broadcast_id, job.payload['text'],
+        on_progress=report_progress,
+        should_stop=lambda: job.cancelled
     )
+    # Progress is only reported every flush_size sends and is throttled; save the final count
+    await job.report(total - stats.get('pending', 0), total, force=True)
+    return format_broadcast_result(stats)
 
-    await message.answer(result_text, reply_markup=admin_menu_keyboard)
-    await state.clear()
 
+SEARCH_ICONS = {**ADMIN_PAGE_ICONS, 'messages': "✉️"}
+
+
+def format_search_row(row: tuple) -> str:
+    kind, row_id, snippet, first_name, username, timestamp = row
+    # Matched terms come back wrapped in \x02 ... \x03
+    snippet = html.escape(snippet or "").replace("\x02", "<b>").replace("\x03", "</b>")
+    return (
+        f"{SEARCH_ICONS[kind]} #{row_id} 👤 {html.escape(first_name or 'Mavjud emas')} (@{username or 'mavjud emas'})\n"
+        f"{snippet}\n🕐 {timestamp}\n{'─' * 30}\n"
+    )
+
+
+async def render_search_page(query: str, results: list, page: int = 0):
+    """Render one page of the ranked (kind, id) results of a search as (text, inline keyboard)."""
+    refs = results[page * ADMIN_PAGE_SIZE:(page + 1) * ADMIN_PAGE_SIZE]
+    rows = await db.get_search_rows(query, refs) if refs else []
+    if not rows:
+        return f"🔍 \"{html.escape(query)}\" bo'yicha hech narsa topilmadi.", search_keyboard(page)
+
+    text = (
+        f"🔍 <b>Qidiruv natijalari:</b> {html.escape(query)} ({len(results)})\n\n"
+        + "".join(format_search_row(row) for row in rows)
+    )
+    return text, search_keyboard(page, has_next=(page + 1) * ADMIN_PAGE_SIZE < len(results))
+
+
+async def run_admin_search(message: Message, state: FSMContext, query: str):
+    # The query and its ranked (kind, id) results are kept in FSM data: pages are slices of that
+    # fixed list (bm25 scores shift with every logged message), and callback data stays small
+    results = await db.search(query, limit=SEARCH_MAX_RESULTS)
+    await state.set_state(None)
+    await state.update_data(search_query=query, search_results=results)
+    text, keyboard = await render_search_page(query, results)
+    await message.answer(text, reply_markup=keyboard or admin_menu_keyboard)
+
+
+@router.message(Command("search"))
+async def search_command(message: Message, command: CommandObject, state: FSMContext):
+    if not is_admin(message.from_user.id):
+        await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
+        return
+
+    if not command.args:
+        await message.answer("Foydalanish: /search &lt;so'zlar&gt;", reply_markup=admin_menu_keyboard)
+        return
+
+    await run_admin_search(message, state, command.args.strip())
+
+
+@text_commands.text(*ADMIN_MENU["search"])
+async def request_search_query(message: Message, state: FSMContext):
+    if not is_admin(message.from_user.id):
+        await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
+        return
+
+    await message.answer("Qidirish uchun so'zlarni kiriting:", reply_markup=cancel_keyboard)
+    await state.set_state(AdminStates.waiting_for_search_query)
+
+
+@router.message(AdminStates.waiting_for_search_query)
+async def process_search_query(message: Message, state: FSMContext):
+    if not is_admin(message.from_user.id):
+        await state.clear()
+        return
+
+    await run_admin_search(message, state, message.text or "")
+
+
+@router.callback_query(F.data.startswith("sr|"))
+async def search_page_callback(callback: CallbackQuery, state: FSMContext):
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫", show_alert=True)
+        return
+
+    data = await state.get_data()
+    query, results = data.get("search_query"), data.get("search_results")
+    page = callback.data.split("|")[1]
+    # Buttons sent before results were kept in FSM data carry a score cursor instead of a page
+    if not query or results is None or not page.isdigit():
+        await callback.answer("Qidiruv eskirgan, qaytadan qidiring.", show_alert=True)
+        return
+
+    text, keyboard = await render_search_page(query, results, int(page))
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@text_commands.text(*ADMIN_MENU["jobs"])
+async def show_jobs_admin(message: Message):
+    user_id = message.from_user.id
+
+    if not is_admin(user_id):
+        await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
+        return
+
+    jobs = await db.get_recent_jobs()
+    if not jobs:
+        await message.answer("Hozircha hech qanday vazifa yo'q.", reply_markup=admin_menu_keyboard)
+        return
+
+    response = "<b>So'nggi vazifalar:</b>\n\n"
+    for job_id, kind, status, progress, total, created_at in jobs:
+        response += f"#{job_id} {job_queue.label(kind)} — {JOB_STATUS_LABELS.get(status, status)}\n"
+        if total:
+            response += f"Jarayon: {progress}/{total}\n"
+        response += f"🕐 {created_at}\n{'─' * 20}\n"
+    await message.answer(response, reply_markup=admin_menu_keyboard)
+
+
+@router.callback_query(F.data.startswith("job_cancel:"))
+async def cancel_job_callback(callback: CallbackQuery):
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫", show_alert=True)
+        return
+
+    job_id = int(callback.data.split(":", 1)[1])
+    if await job_queue.cancel(job_id):
+        await callback.answer("Vazifa bekor qilinmoqda...")
+    else:
+        await callback.answer("Vazifa allaqachon yakunlangan.")
+
+
+TICKET_STATUS_LABELS = {
+    'open': "🆕 Yangi",
+    'claimed': "✋ Olingan",
+}
+
+TICKET_CLAIM_REPLIES = {
+    'claimed': "✋ #{} murojaat sizga biriktirildi.",
+    'mine': "#{} murojaat allaqachon sizda.",
+    'taken': "#{} murojaatni boshqa admin olgan.",
+    'missing': "#{} murojaat topilmadi yoki yopilgan.",
+}
+
+
+@text_commands.text(*ADMIN_MENU["tickets"])
+async def show_tickets_admin(message: Message):
+    user_id = message.from_user.id
+
+    if not is_admin(user_id):
+        await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
+        return
+
+    rows = await db.get_admin_tickets(user_id)
+    if not rows:
+        await message.answer("Sizda ochiq murojaatlar yo'q. ✅", reply_markup=admin_menu_keyboard)
+        return
+
+    response = f"<b>Ochiq murojaatlaringiz ({tickets.load.get(user_id, len(rows))}):</b>\n\n"
+    for ticket_id, kind, summary, status, created_at, first_name, username in rows:
+        response += (
+            f"🎫 <b>#{ticket_id}</b> {TICKET_STATUS_LABELS.get(status, status)}\n"
+            f"👤 {html.escape(first_name or 'Mavjud emas')} (@{username or 'Mavjud emas'})\n"
+            f"{html.escape(summary or '')}\n"
+            f"🕐 {created_at}\n{'─' * 20}\n"
+        )
+    await message.answer(response, reply_markup=ticket_keyboard([row[0] for row in rows]))
+
+
+@text_commands.text(*ADMIN_MENU["open_tickets"])
+async def show_open_tickets_admin(message: Message):
+    user_id = message.from_user.id
 
-@router.message(F.text == "Promokodlar yaratish 🎫")
+    if not is_admin(user_id):
+        await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
+        return
+
+    rows = await db.get_open_tickets()
+    if not rows:
+        await message.answer("Olinmagan murojaatlar yo'q. ✅", reply_markup=admin_menu_keyboard)
+        return
+
+    response = "<b>Olinmagan murojaatlar (barcha adminlar):</b>\n\n"
+    for ticket_id, kind, summary, admin_id, created_at, first_name, username in rows:
+        owner = "sizda" if admin_id == user_id else f"admin {admin_id}"
+        response += (
+            f"🎫 <b>#{ticket_id}</b> {TICKET_STATUS_LABELS['open']} ({owner})\n"
+            f"👤 {html.escape(first_name or 'Mavjud emas')} (@{username or 'Mavjud emas'})\n"
+            f"{html.escape(summary or '')}\n"
+            f"🕐 {created_at}\n{'─' * 20}\n"
+        )
+    await message.answer(response, reply_markup=ticket_keyboard([row[0] for row in rows]))
+
+
+@router.callback_query(F.data.startswith("tk|"))
+async def ticket_callback(callback: CallbackQuery):
+    user_id = callback.from_user.id
+    if not is_admin(user_id):
+        await callback.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫", show_alert=True)
+        return
+
+    _, action, ticket_id = callback.data.split("|")
+    ticket_id = int(ticket_id)
+    if action == "claim":
+        result = await tickets.claim_ticket(ticket_id, user_id)
+        await callback.answer(TICKET_CLAIM_REPLIES[result].format(ticket_id), show_alert=result != 'claimed')
+    elif await tickets.close_ticket(ticket_id, user_id):
+        await callback.answer(f"✅ #{ticket_id} murojaat yopildi.")
+    else:
+        await callback.answer(f"#{ticket_id} murojaatni faqat uni olgan admin yopa oladi yoki u allaqachon yopilgan.",
+                              show_alert=True)
+
+
+@text_commands.text(*ADMIN_MENU["create_promocode"])
 async def request_promocode_creation(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
@@ -604,7 +1007,7 @@ async def process_promocode_creation(message: Message, state: FSMContext):
         code = code.strip()
         description = description.strip()
 
-        if db.add_promocode(code, description):
+        if await db.add_promocode(code, description):
             await message.answer(f"✅ Promokod '{code}' muvaffaqiyatli yaratildi!", reply_markup=admin_menu_keyboard)
         else:
             await message.answer("❌ Promokod yaratishda xatolik yuz berdi. Ehtimol bunday kod allaqachon mavjud.",
@@ -616,7 +1019,7 @@ async def process_promocode_creation(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.message(F.text == "Fikrlar ko'rish 👁️")
+@text_commands.text(*ADMIN_MENU["feedback"])
 async def view_feedback_admin(message: Message):
     user_id = message.from_user.id
 
@@ -624,23 +1027,10 @@ async def view_feedback_admin(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    feedback_list = db.get_all_feedback()
-    if feedback_list:
-        response = "<b>Barcha fikrlar:</b>\n\n"
-        for feedback, first_name, username, timestamp in feedback_list:
-            response += f"👤 {first_name} (@{username or 'mavjud emas'})\n💬 {feedback}\n🕐 {timestamp}\n{'─' * 30}\n"
+    await send_admin_page(message, 'feedback')
 
-        if len(response) > 4000:
-            parts = [response[i:i + 4000] for i in range(0, len(response), 4000)]
-            for part in parts:
-                await message.answer(part, reply_markup=admin_menu_keyboard)
-        else:
-            await message.answer(response, reply_markup=admin_menu_keyboard)
-    else:
-        await message.answer("Hozircha hech qanday fikr yo'q.", reply_markup=admin_menu_keyboard)
 
-
-@router.message(F.text == "Takliflar ko'rish 💡")
+@text_commands.text(*ADMIN_MENU["suggestions"])
 async def view_suggestions_admin(message: Message):
     user_id = message.from_user.id
 
@@ -648,23 +1038,10 @@ async def view_suggestions_admin(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    suggestions_list = db.get_all_suggestions()
-    if suggestions_list:
-        response = "<b>Barcha takliflar:</b>\n\n"
-        for suggestion, first_name, username, timestamp in suggestions_list:
-            response += f"👤 {first_name} (@{username or 'mavjud emas'})\n💡 {suggestion}\n🕐 {timestamp}\n{'─' * 30}\n"
+    await send_admin_page(message, 'suggestions')
 
-        if len(response) > 4000:
-            parts = [response[i:i + 4000] for i in range(0, len(response), 4000)]
-            for part in parts:
-                await message.answer(part, reply_markup=admin_menu_keyboard)
-        else:
-            await message.answer(response, reply_markup=admin_menu_keyboard)
-    else:
-        await message.answer("Hozircha hech qanday taklif yo'q.", reply_markup=admin_menu_keyboard)
 
-
-@router.message(F.text == "Shikoyatlar ko'rish 🚨")
+@text_commands.text(*ADMIN_MENU["complaints"])
 async def view_complaints_admin(message: Message):
     user_id = message.from_user.id
 
@@ -672,23 +1049,10 @@ async def view_complaints_admin(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    complaints_list = db.get_all_complaints()
-    if complaints_list:
-        response = "<b>Barcha shikoyatlar:</b>\n\n"
-        for complaint, first_name, username, timestamp in complaints_list:
-            response += f"👤 {first_name} (@{username or 'mavjud emas'})\n🚨 {complaint}\n🕐 {timestamp}\n{'─' * 30}\n"
-
-        if len(response) > 4000:
-            parts = [response[i:i + 4000] for i in range(0, len(response), 4000)]
-            for part in parts:
-                await message.answer(part, reply_markup=admin_menu_keyboard)
-        else:
-            await message.answer(response, reply_markup=admin_menu_keyboard)
-    else:
-        await message.answer("Hozircha hech qanday shikoyat yo'q.", reply_markup=admin_menu_keyboard)
+    await send_admin_page(message, 'complaints')
 
 
-@router.message(F.text == "Savollar ko'rish ❓")
+@text_commands.text(*ADMIN_MENU["questions"])
 async def view_questions_admin(message: Message):
     user_id = message.from_user.id
 
@@ -696,80 +1060,44 @@ async def view_questions_admin(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    questions_list = db.get_all_questions()
-    if questions_list:
-        response = "<b>Barcha savollar:</b>\n\n"
-        for question, first_name, username, timestamp in questions_list:
-            response += f"👤 {first_name} (@{username or 'mavjud emas'})\n❓ {question}\n🕐 {timestamp}\n{'─' * 30}\n"
-
-        if len(response) > 4000:
-            parts = [response[i:i + 4000] for i in range(0, len(response), 4000)]
-            for part in parts:
-                await message.answer(part, reply_markup=admin_menu_keyboard)
-        else:
-            await message.answer(response, reply_markup=admin_menu_keyboard)
-    else:
-        await message.answer("Hozircha hech qanday savol yo'q.", reply_markup=admin_menu_keyboard)
+    await send_admin_page(message, 'questions')
 
 
 # --- Callback Query Handlers ---
 
 @router.callback_query(F.data == "main_menu")
-async def callback_main_menu(callback: CallbackQuery, state: FSMContext):
+async def callback_main_menu(callback: CallbackQuery, state: FSMContext, locale: str):
     await state.clear()
     user_id = callback.from_user.id
-    db.add_message(user_id=user_id, message_text=callback.data, message_type='callback')
-    await callback.message.edit_text("Asosiy menyu:")
-    await callback.message.answer("Asosiy menyu:", reply_markup=main_menu_keyboard)
+    await db.add_message(user_id=user_id, message_text=callback.data, message_type='callback')
+    await callback.message.edit_text(i18n.get(locale, "main_menu"))
+    await callback.message.answer(i18n.get(locale, "main_menu"), reply_markup=main_menu_keyboards[locale])
     await callback.answer()
 
 
 @router.callback_query(F.data == "back")
-async def callback_back(callback: CallbackQuery):
+async def callback_back(callback: CallbackQuery, locale: str):
     user_id = callback.from_user.id
-    db.add_message(user_id=user_id, message_text=callback.data, message_type='callback')
-    await callback.message.edit_text("Asosiy menyu:")
-    await callback.message.answer("Asosiy menyu:", reply_markup=main_menu_keyboard)
+    await db.add_message(user_id=user_id, message_text=callback.data, message_type='callback')
+    await callback.message.edit_text(i18n.get(locale, "main_menu"))
+    await callback.message.answer(i18n.get(locale, "main_menu"), reply_markup=main_menu_keyboards[locale])
     await callback.answer()
 
 
 # --- Placeholder handlers for remaining buttons ---
 
-@router.message(F.text.in_([
-    "Rezume yuklash 📄", "Biz bilan bog'lanish 📞", "Rasmlar galereyasi 🏞️",
-    "Video galereyasi 🎥", "So'ngi yangiliklar 📰", "Referal tizimi 🤝",
-    "Narxlar ro'yxati 💰", "Bepul xizmatlar ✅", "Pullik xizmatlar 💳",
-    "Adminga yozish ✍️", "Tanishuv so'rovi yuborish 👋", "Ilova bog'lash / qo'llab-quvvatlash 🛠️"
-]))
-async def placeholder_handlers(message: Message):
-    user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-
-    responses = {
-        "Rezume yuklash 📄": "Rezume yuklash funksiyasi tez orada qo'shiladi.",
-        "Biz bilan bog'lanish 📞": "Biz bilan bog'lanish:\n📞 Telefon: +998901234567\n📧 Email: info@example.com",
-        "Rasmlar galereyasi 🏞️": "Rasmlar galereyasi tez orada qo'shiladi.",
-        "Video galereyasi 🎥": "Video galereyasi tez orada qo'shiladi.",
-        "So'ngi yangiliklar 📰": "So'ngi yangiliklar tez orada qo'shiladi.",
-        "Referal tizimi 🤝": "Referal tizimi tez orada qo'shiladi.",
-        "Narxlar ro'yxati 💰": "Narxlar ro'yxati tez orada qo'shiladi.",
-        "Bepul xizmatlar ✅": "Bepul xizmatlar ro'yxati tez orada qo'shiladi.",
-        "Pullik xizmatlar 💳": "Pullik xizmatlar ro'yxati tez orada qo'shiladi.",
-        "Adminga yozish ✍️": "Adminga xabar yuborish uchun 'Matnli xabar yuborish' tugmasini ishlating.",
-        "Tanishuv so'rovi yuborish 👋": "Tanishuv so'rovi funksiyasi tez orada qo'shiladi.",
-        "Ilova bog'lash / qo'llab-quvvatlash 🛠️": "Qo'llab-quvvatlash xizmati tez orada qo'shiladi."
-    }
-
-    response = responses.get(message.text, "Bu funksiya hali ishlab chiqilmoqda.")
-    await message.answer(response, reply_markup=main_menu_keyboard)
+@text_commands.text(*MAIN_MENU.static_replies)
+async def placeholder_handlers(message: Message, locale: str):
+    user_id = message.from_user.id
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+
+    await message.answer(i18n.get(locale, MAIN_MENU.static_replies[message.text]),
+                         reply_markup=main_menu_keyboards[locale])
 
 
 # --- Admin placeholder handlers ---
 
-@router.message(F.text.in_([
-    "Har bir foydalanuvchiga yozish ✍️", "Tugma yaratish (custom keyboard) ⌨️",
-    "Rasm/video/fayl joylash ➕", "To'lovlar nazorati (optional) 💳", "Xatoliklarni ko'rish (logs) 📜"
-]))
+@text_commands.text(*ADMIN_MENU.static_replies)
 async def admin_placeholder_handlers(message: Message):
     user_id = message.from_user.id
 
@@ -777,54 +1105,100 @@ async def admin_placeholder_handlers(message: Message):
         await message.answer("Siz admin emassiz yoki tizimga kirmagansiz. 🚫")
         return
 
-    responses = {
-        "Har bir foydalanuvchiga yozish ✍️": "Individual xabar yuborish funksiyasi tez orada qo'shiladi.",
-        "Tugma yaratish (custom keyboard) ⌨️": "Custom keyboard yaratish funksiyasi tez orada qo'shiladi.",
-        "Rasm/video/fayl joylash ➕": "Media joylash funksiyasi tez orada qo'shiladi.",
-        "To'lovlar nazorati (optional) 💳": "To'lovlar nazorati funksiyasi tez orada qo'shiladi.",
-        "Xatoliklarni ko'rish (logs) 📜": "Loglarni ko'rish funksiyasi tez orada qo'shiladi."
-    }
-
-    response = responses.get(message.text, "Bu admin funksiyasi hali ishlab chiqilmoqda.")
-    await message.answer(response, reply_markup=admin_menu_keyboard)
+    await message.answer(i18n.get(i18n.default_locale, ADMIN_MENU.static_replies[message.text]),
+                         reply_markup=admin_menu_keyboard)
 
 
 # --- Generic Text Message Handler (fallback) ---
 
 @router.message(F.text)
-async def generic_text_handler(message: Message):
+async def generic_text_handler(message: Message, locale: str):
     user_id = message.from_user.id
-    db.add_message(user_id=user_id, message_text=message.text, message_type='text')
-    await message.answer(
-        "Kechirasiz, men bu xabarni tushunmadim. Iltimos, menyudagi tugmalardan foydalaning.",
-        reply_markup=main_menu_keyboard
-    )
+    await db.add_message(user_id=user_id, message_text=message.text, message_type='text')
+    await message.answer(i18n.get(locale, "not_understood"), reply_markup=main_menu_keyboards[locale])
 
 
 # --- Startup and Shutdown Hooks ---
 
 async def on_startup():
     logging.info("Bot is starting...")
-    db.connect()
-    db.create_tables()
     logging.info(f"Media directory: {MEDIA_DIR}")
+    run_in_background(db.run_periodic_maintenance(DB_MAINTENANCE_INTERVAL))
+    run_in_background(storage.run_periodic_eviction())
+    run_in_background(message_retention.run_periodic(RETENTION_INTERVAL))
+    await admin_sessions.load()
+    await tickets.start()
+    await job_queue.start()
+    if media_archiver is not None:
+        media_archiver.start()
     logging.info("Bot started successfully!")
 
 
 async def on_shutdown():
     logging.info("Bot is shutting down...")
-    db.close()
+    await job_queue.close()
+    await media_group_collector.close()
+    await tickets.close()
+    if media_archiver is not None:
+        await media_archiver.close()
+    await user_upsert_middleware.close()
+    await db.close()
     logging.info("Database connection closed.")
     logging.info("Bot shut down successfully!")
 
 
 # --- Main function to run the bot ---
 
-async def main():
+async def on_webhook_startup():
+    await bot.set_webhook(
+        f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=min(UPDATE_MAX_CONCURRENCY, 100)
+    )
+    logging.info(f"Webhook set to {WEBHOOK_BASE_URL}{WEBHOOK_PATH}")
+
+
+async def run_webhook():
+    app = web.Application()
+    SimpleRequestHandler(
+        dp, bot,
+        handle_in_background=True,
+        secret_token=WEBHOOK_SECRET or None
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+        logging.info(f"Webhook server listening on {WEBAPP_HOST}:{WEBAPP_PORT}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def setup_dispatcher():
+    """Register the update middlewares and routers (also used by the scripts in bench/)."""
+    dp.update.outer_middleware(user_upsert_middleware)
+    dp.update.outer_middleware(locale_middleware)
+    dp.update.outer_middleware(update_scheduler_middleware)
+    dp.include_router(text_commands)
     dp.include_router(router)
+
+
+async def main():
+    setup_dispatcher()
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
-    await dp.start_polling(bot)
+
+    if RUN_MODE == "webhook":
+        dp.startup.register(on_webhook_startup)
+        await run_webhook()
+    else:
+        # Polling and an active webhook are mutually exclusive on Telegram's side
+        await bot.delete_webhook()
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
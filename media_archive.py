@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+import aiofiles
+from aiogram import Bot
+
+from database import AsyncDatabase, LRUCache
+
+
+class MediaArchiver:
+    """Background, deduplicating archive of media sent to the bot.
+
+    Files are downloaded by a bounded pool of workers, off the update
+    handlers, and streamed to disk chunk by chunk while being hashed.
+    Each file is stored once under its SHA-256 (MEDIA_DIR/ab/abcdef...ext),
+    and the media_index table maps Telegram's file_unique_id to that path,
+    so resends of the same file are neither downloaded nor stored again.
+    """
+
+    def __init__(self, bot: Bot, db: AsyncDatabase, media_dir, workers=4, queue_size=1000, chunk_size=64 * 1024,
+                 seen_cache_size=10000):
+        self.bot = bot
+        self.db = db
+        self.media_dir = media_dir
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.seen = LRUCache(seen_cache_size)
+        self._tasks = []
+
+    def submit(self, file_id, file_unique_id):
+        """Queue a file for archiving without waiting for it."""
+        if self.seen.get(file_unique_id):
+            return
+        try:
+            self.queue.put_nowait((file_id, file_unique_id))
+        except asyncio.QueueFull:
+            logging.warning(f"Media archive queue is full, skipping {file_unique_id}")
+            return
+        self.seen.set(file_unique_id, True)
+
+    async def archive(self, file_id, file_unique_id):
+        if await self.db.get_media(file_unique_id):
+            return
+
+        file = await self.bot.get_file(file_id)
+        extension = os.path.splitext(file.file_path or "")[1]
+        tmp_path = os.path.join(self.media_dir, f".{uuid.uuid4().hex}.part")
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in self.bot.session.stream_content(
+                        url=self.bot.session.api.file_url(self.bot.token, file.file_path),
+                        chunk_size=self.chunk_size,
+                        raise_for_status=True
+                ):
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
+
+            digest = sha256.hexdigest()
+            existing = await self.db.get_media_by_hash(digest)
+            if existing:
+                path = existing[0]
+            else:
+                path = os.path.join(self.media_dir, digest[:2], f"{digest}{extension}")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        await self.db.add_media(file_unique_id, digest, path, size)
+        logging.info(f"Archived media {file_unique_id} ({size} bytes) as {path}")
+
+    async def _worker(self):
+        while True:
+            file_id, file_unique_id = await self.queue.get()
+            try:
+                await self.archive(file_id, file_unique_id)
+            except Exception as e:
+                # Let a later resend of the same file try again
+                self.seen.pop(file_unique_id)
+                logging.error(f"Error archiving media {file_unique_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        os.makedirs(self.media_dir, exist_ok=True)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        if self.queue.qsize():
+            logging.info(f"{self.queue.qsize()} queued media files were not archived.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+from aiogram.types import Message
+
+
+class MediaGroupCollector:
+    """Collects the parts of a media group (album) into one batch.
+
+    Telegram delivers every photo/video of an album as a separate message
+    sharing one media_group_id. Parts are buffered per media_group_id and
+    handed to `on_complete` together, in message order, once no new part
+    has arrived for `window` seconds.
+    """
+
+    def __init__(self, on_complete: Callable[[List[Message]], Awaitable[None]], window=1.0):
+        self.on_complete = on_complete
+        self.window = window
+        self.groups = {}
+        self._timers = {}
+        self._tasks = set()
+
+    def add(self, message: Message):
+        group_id = message.media_group_id
+        self.groups.setdefault(group_id, []).append(message)
+        timer = self._timers.get(group_id)
+        if timer is not None:
+            timer.cancel()
+        self._timers[group_id] = asyncio.get_running_loop().call_later(self.window, self._schedule_complete, group_id)
+
+    def _schedule_complete(self, group_id):
+        task = asyncio.create_task(self.complete(group_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def complete(self, group_id):
+        timer = self._timers.pop(group_id, None)
+        if timer is not None:
+            timer.cancel()
+        messages = self.groups.pop(group_id, None)
+        if not messages:
+            return
+        messages.sort(key=lambda m: m.message_id)
+        try:
+            await self.on_complete(messages)
+        except Exception as e:
+            logging.error(f"Error processing media group {group_id}: {e}")
+
+    async def close(self):
+        for group_id in list(self.groups):
+            await self.complete(group_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
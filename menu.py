@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from i18n import i18n
+
+
+@dataclass(frozen=True)
+class MenuButton:
+    key: str
+    # Catalog key of the button label
+    label: str
+    # Catalog key of the fixed answer for buttons whose feature is not implemented yet
+    reply: Optional[str] = None
+
+
+class Menu:
+    """A reply keyboard declared once, as rows of MenuButtons.
+
+    Everything derived from the declaration is built at import time, for
+    every locale in `locales` (all catalogs by default): one
+    ReplyKeyboardMarkup per locale, the key -> labels lookup used by
+    handler registrations (`MAIN_MENU["photo"]` is the button's label in
+    every locale), the label -> canonical (default locale) label map and
+    the label -> reply catalog key table for placeholder buttons.
+    """
+
+    def __init__(self, rows: List[List[MenuButton]], one_time_keyboard=False, locales=None):
+        self.rows = rows
+        self.locales = tuple(locales or i18n.locales)
+        self.buttons = {button.key: button for row in rows for button in row}
+        self.keyboards = {
+            locale: ReplyKeyboardMarkup(
+                keyboard=[[KeyboardButton(text=i18n.get(locale, button.label)) for button in row] for row in rows],
+                resize_keyboard=True,
+                one_time_keyboard=one_time_keyboard
+            )
+            for locale in self.locales
+        }
+        self.keyboard = self.keyboards[i18n.default_locale]
+        self.labels = {
+            key: tuple(dict.fromkeys(i18n.get(locale, button.label) for locale in self.locales))
+            for key, button in self.buttons.items()
+        }
+        self.canonical = {
+            label: i18n.get(i18n.default_locale, self.buttons[key].label)
+            for key, labels in self.labels.items() for label in labels
+        }
+        self.texts = frozenset(self.canonical)
+        self.static_replies = {
+            label: self.buttons[key].reply
+            for key, labels in self.labels.items() for label in labels if self.buttons[key].reply
+        }
+
+    def __getitem__(self, key) -> tuple:
+        return self.labels[key]
+
+
+HOME = MenuButton("home", "menu.home")
+CANCEL = MenuButton("cancel", "menu.cancel")
+
+
+def _button(key, reply=False):
+    return MenuButton(key, f"menu.{key}", f"replies.{key}" if reply else None)
+
+
+def _admin_button(key, reply=False):
+    return MenuButton(key, f"admin_menu.{key}", f"admin_replies.{key}" if reply else None)
+
+
+MAIN_MENU = Menu([
+    [HOME],
+    [_button("photo"), _button("video")],
+    [_button("text_message"), _button("document")],
+    [_button("resume", reply=True), _button("question")],
+    [_button("contact_us", reply=True), _button("suggestion")],
+    [_button("feedback"), _button("faq")],
+    [_button("personal_info"), _button("stats")],
+    [_button("photo_gallery", reply=True), _button("video_gallery", reply=True)],
+    [_button("news", reply=True), _button("channel")],
+    [_button("referral", reply=True), _button("promocode")],
+    [_button("prices", reply=True), _button("free_services", reply=True)],
+    [_button("paid_services", reply=True), _button("write_admin", reply=True)],
+    [_button("complaint"), _button("acquaintance", reply=True)],
+    [_button("location"), _button("contact")],
+    [_button("support", reply=True)],
+])
+
+# The admin panel is only translated into the default locale
+ADMIN_MENU = Menu([
+    [_admin_button("users")],
+    [_admin_button("message_user", reply=True)],
+    [_admin_button("user_stats")],
+    [_admin_button("broadcast")],
+    [_admin_button("custom_keyboard", reply=True)],
+    [_admin_button("media_post", reply=True)],
+    [_admin_button("create_promocode")],
+    [_admin_button("payments", reply=True)],
+    [_admin_button("feedback")],
+    [_admin_button("suggestions")],
+    [_admin_button("complaints")],
+    [_admin_button("questions")],
+    [_admin_button("logs", reply=True)],
+    [_admin_button("search")],
+    [_admin_button("tickets")],
+    [_admin_button("open_tickets")],
+    [_admin_button("jobs")],
+    [_admin_button("logout")],
+    [HOME],
+], locales=(i18n.default_locale,))
+
+CANCEL_MENU = Menu([[CANCEL]], one_time_keyboard=True)
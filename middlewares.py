@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from buffers import WriteBehindBuffer
+from database import AsyncDatabase, LRUCache
+from i18n import I18n
+
+
+class UserUpsertMiddleware(WriteBehindBuffer, BaseMiddleware):
+    """Outer update middleware that keeps the users table in sync with Telegram.
+
+    Every update's sender is compared against an in-memory "last seen"
+    profile map; only new or changed profiles are queued, and queued
+    profiles are written with one batched upsert every flush_interval
+    seconds or batch_size users. A failed upsert is retried with the next
+    flush.
+    """
+
+    def __init__(self, db: AsyncDatabase, flush_interval=1.0, batch_size=200, seen_cache_size=100000):
+        super().__init__(flush_interval)
+        self.db = db
+        self.batch_size = batch_size
+        self.seen = LRUCache(seen_cache_size)
+        self.pending = {}
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            self.touch(user)
+        return await handler(event, data)
+
+    def touch(self, user: User):
+        profile = (user.id, user.username, user.first_name, user.last_name, int(user.is_bot), user.language_code)
+        if self.seen.get(user.id) == profile:
+            return
+        self.seen.set(user.id, profile)
+        self.pending[user.id] = profile
+        if len(self.pending) >= self.batch_size:
+            self.flush_soon()
+        else:
+            self.schedule()
+
+    def take(self):
+        pending, self.pending = self.pending, {}
+        return pending
+
+    async def write(self, pending):
+        if await self.db.upsert_users(list(pending.values())) is None:
+            logging.error(f"User upsert failed for {len(pending)} users")
+            return pending
+        return None
+
+    def restore(self, pending):
+        # Profiles queued since the failed batch was taken are newer
+        for user_id, profile in pending.items():
+            self.pending.setdefault(user_id, profile)
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """Outer update middleware: sequential per user, parallel across users.
+
+    Updates are sharded by sender id into per-user FIFO queues (an
+    asyncio.Lock hands itself over in arrival order), and at most
+    max_concurrency handlers run at once overall. Because aiogram's FSM
+    middleware reads the state before this one runs, the state is
+    re-read once the user's turn comes, so every update sees the state
+    left by the previous one.
+    """
+
+    def __init__(self, max_concurrency=100):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # user id -> [lock, number of updates holding or waiting for it]
+        self._user_locks = {}
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            async with self.semaphore:
+                return await handler(event, data)
+
+        entry = self._user_locks.setdefault(user.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self.semaphore:
+                    if "state" in data:
+                        data["raw_state"] = await data["state"].get_state()
+                    return await handler(event, data)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[user.id]
+
+
+class LocaleMiddleware(BaseMiddleware):
+    """Outer update middleware injecting the sender's locale as `locale`.
+
+    The locale comes from the language_code Telegram sends with every
+    update, resolved through the I18n memo, so no database lookup is
+    needed per update.
+    """
+
+    def __init__(self, i18n: I18n):
+        self.i18n = i18n
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        data["locale"] = self.i18n.resolve(user.language_code if user is not None else None)
+        return await handler(event, data)
@@ -0,0 +1,319 @@
+import sqlite3
+import logging
+
+# Schema migrations, applied in order on top of the base tables from
+# Database.create_tables. The database's PRAGMA user_version records the
+# last applied migration. Each step is a list of SQL statements or
+# callables taking the connection, and runs in its own transaction, so a
+# live bot_data.db is upgraded in place and a failed step is rolled back
+# without bumping the version and aborts startup. Steps marked with
+# @outside_transaction (e.g. VACUUM, which SQLite refuses inside a
+# transaction) make their migration run in autocommit mode instead.
+#
+# Statements use IF NOT EXISTS / OR IGNORE so databases that already have
+# some of these objects (created before migrations existed) upgrade cleanly.
+
+
+def add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def outside_transaction(step):
+    """Mark a migration step that cannot run inside a transaction."""
+    step.outside_transaction = True
+    return step
+
+
+@outside_transaction
+def enable_incremental_vacuum(conn):
+    """Switch the file to incremental auto_vacuum; existing files only switch after a full VACUUM."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        logging.info("Converting database to incremental auto_vacuum (one-time full VACUUM)...")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+# Tables covered by full-text search and their text column
+SEARCH_COLUMNS = {
+    'feedback': 'feedback_text',
+    'suggestions': 'suggestion_text',
+    'complaints': 'complaint_text',
+    'questions': 'question_text',
+    'messages': 'message_text',
+}
+
+
+def create_search_index(conn):
+    """External-content FTS5 table per searchable table, kept in sync by triggers, then backfilled."""
+    for table, column in SEARCH_COLUMNS.items():
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {column}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, {column}) VALUES (new.id, new.{column});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {column} ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                INSERT INTO {table}_fts (rowid, {column}) VALUES (new.id, new.{column});
+            END
+        """)
+        conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [
+    (1, "Per-user message counters", [
+        """
+        CREATE TABLE IF NOT EXISTS user_message_counts
+        (
+            user_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO user_message_counts (user_id, message_count)
+        SELECT user_id, COUNT(*) FROM messages GROUP BY user_id
+        """,
+    ]),
+    (2, "Maintained stats counters", [
+        """
+        CREATE TABLE IF NOT EXISTS stats_counters
+        (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO stats_counters (name, value) SELECT 'users', COUNT(*) FROM users",
+    ]),
+    (3, "Broadcast delivery state", [
+        """
+        CREATE TABLE IF NOT EXISTS broadcasts
+        (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_text TEXT,
+            status TEXT DEFAULT 'running',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries
+        (
+            broadcast_id INTEGER,
+            user_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            error TEXT,
+            PRIMARY KEY (broadcast_id, user_id),
+            FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (4, "Indexes on user_id and timestamp columns", [
+        # (timestamp, id) serves both plain timestamp ordering and keyset pagination
+        "CREATE INDEX IF NOT EXISTS idx_users_added_at_id ON users (added_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_user_id_timestamp ON messages (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_timestamp_id ON messages (timestamp, id)",
+        "DROP INDEX IF EXISTS idx_messages_user_id",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_user_id_timestamp ON feedback (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_timestamp_id ON feedback (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_suggestions_user_id_timestamp ON suggestions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_suggestions_timestamp_id ON suggestions (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_user_id_timestamp ON complaints (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_timestamp_id ON complaints (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_user_id_timestamp ON questions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_timestamp_id ON questions (timestamp, id)",
+    ]),
+    (5, "Persistent FSM storage", [
+        """
+        CREATE TABLE IF NOT EXISTS fsm_storage
+        (
+            storage_key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at ON fsm_storage (updated_at)",
+    ]),
+    (6, "Background job queue", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs
+        (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            result TEXT,
+            chat_id INTEGER,
+            message_id INTEGER,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)",
+    ]),
+    (7, "Content-addressed media archive index", [
+        """
+        CREATE TABLE IF NOT EXISTS media_index
+        (
+            file_unique_id TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_media_index_sha256 ON media_index (sha256)",
+    ]),
+    (8, "Full-text search index", [
+        create_search_index,
+    ]),
+    (9, "Daily rollup of pruned messages", [
+        """
+        CREATE TABLE IF NOT EXISTS messages_daily
+        (
+            day TEXT NOT NULL,
+            message_type TEXT NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, message_type)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (10, "Analytics rollups maintained on the write path", [
+        """
+        CREATE TABLE IF NOT EXISTS messages_hourly
+        (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, hour)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS button_presses
+        (
+            day TEXT NOT NULL,
+            button_text TEXT NOT NULL,
+            press_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, button_text)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_active_users
+        (
+            day TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (day, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_stats
+        (
+            day TEXT PRIMARY KEY,
+            active_users INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        # messages_daily so far only held rows pruned by retention; add the live ones
+        """
+        INSERT INTO messages_daily (day, message_type, message_count)
+        SELECT date(timestamp), message_type, COUNT(*)
+        FROM messages
+        WHERE true
+        GROUP BY date(timestamp), message_type
+        ON CONFLICT (day, message_type) DO UPDATE SET message_count = message_count + excluded.message_count
+        """,
+        """
+        INSERT OR IGNORE INTO messages_hourly (day, hour, message_count)
+        SELECT date(timestamp), CAST(strftime('%H', timestamp) AS INTEGER), COUNT(*)
+        FROM messages
+        GROUP BY 1, 2
+        """,
+        """
+        INSERT OR IGNORE INTO daily_active_users (day, user_id)
+        SELECT DISTINCT date(timestamp), user_id
+        FROM messages
+        """,
+        """
+        INSERT OR IGNORE INTO daily_stats (day, active_users)
+        SELECT day, COUNT(*)
+        FROM daily_active_users
+        GROUP BY day
+        """,
+    ]),
+    (11, "Admin session expiry", [
+        # Sessions from before this migration have no expiry and must log in again
+        lambda conn: add_column(conn, 'admin_sessions', 'expires_at', 'TIMESTAMP'),
+    ]),
+    (12, "Tickets assigned to admins", [
+        """
+        CREATE TABLE IF NOT EXISTS tickets
+        (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            kind TEXT,
+            summary TEXT,
+            admin_id INTEGER,
+            status TEXT DEFAULT 'open',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            claimed_at TIMESTAMP,
+            closed_at TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tickets_admin_id_status ON tickets (admin_id, status)",
+    ]),
+    (13, "Incremental auto_vacuum", [
+        enable_incremental_vacuum,
+    ]),
+    (14, "Index on ticket status", [
+        "CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status)",
+    ]),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """Apply all pending migrations. Returns the resulting schema version.
+
+    A failed step is rolled back and its error re-raised, so the bot does
+    not start on a partially migrated schema.
+    """
+    version = get_schema_version(conn)
+    for target, description, steps in MIGRATIONS:
+        if target <= version:
+            continue
+        in_transaction = not any(getattr(step, 'outside_transaction', False) for step in steps)
+        try:
+            if in_transaction:
+                conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+            version = target
+            logging.info(f"Applied migration {target}: {description}")
+        except sqlite3.Error as e:
+            if in_transaction:
+                conn.rollback()
+            logging.error(f"Migration {target} ({description}) failed: {e}")
+            raise
+    return version
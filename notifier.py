@@ -0,0 +1,138 @@
+import asyncio
+import html
+import logging
+from typing import List
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.types import Message, User, InputMediaPhoto, InputMediaVideo, InputMediaDocument
+
+from buffers import WriteBehindBuffer
+from keyboards import ticket_keyboard
+
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+# Two buttons per ticket, and Telegram allows 100 buttons per keyboard
+TICKETS_PER_DIGEST = 50
+
+INPUT_MEDIA_TYPES = {
+    'photo': InputMediaPhoto,
+    'video': InputMediaVideo,
+    'document': InputMediaDocument,
+}
+
+
+def format_sender(user: User) -> str:
+    return (
+        f"<b>Yuboruvchi:</b>\n"
+        f"👤 {html.escape(user.first_name or 'Mavjud emas')}\n"
+        f"🆔 @{user.username or 'Mavjud emas'}\n"
+        f"🔢 ID: {user.id}"
+    )
+
+
+def truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def format_ticket(ticket_id) -> str:
+    return f"🎫 <b>#{ticket_id}</b>\n" if ticket_id else ""
+
+
+class AdminNotifier(WriteBehindBuffer):
+    """Notification pipeline for one admin chat.
+
+    Media is copied to the admin with the sender info in the caption, so
+    every media event costs a single Bot API call and no DB lookup. Text
+    notifications are queued and sent every digest_interval seconds: a
+    lone notification goes out as before, while a burst is packed into as
+    few digest messages as the message size limit allows. Items carrying
+    a ticket id get its claim/close buttons. Digests that fail with a
+    network, server or flood error are queued again for the next digest.
+    """
+
+    def __init__(self, bot: Bot, admin_id, digest_interval=2.0, max_retries=3):
+        super().__init__(digest_interval)
+        self.bot = bot
+        self.admin_id = admin_id
+        self.max_retries = max_retries
+        self.pending = []
+
+    async def _call(self, method, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await method(*args, **kwargs)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning(f"Flood limit hit in admin chat, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+
+    def notify(self, text: str, user: User = None, ticket_id=None):
+        """Queue a plain-text notification for the next digest."""
+        text = format_ticket(ticket_id) + html.escape(truncate(text, MESSAGE_LIMIT - 500))
+        self.pending.append((f"{text}\n\n{format_sender(user)}" if user else text, ticket_id))
+        self.schedule()
+
+    def take(self):
+        pending, self.pending = self.pending, []
+        return pending
+
+    def restore(self, pending):
+        self.pending[:0] = pending
+
+    async def write(self, pending):
+        """Send the queued items as digests; returns the items of digests worth retrying."""
+        if len(pending) == 1:
+            item, ticket_id = pending[0]
+            messages = [(f"<b>Yangi xabar:</b>\n\n{item}", [ticket_id] if ticket_id else [], pending)]
+        else:
+            messages = []
+            text, ticket_ids, items = f"<b>Yangi xabarlar ({len(pending)}):</b>", [], []
+            for item, ticket_id in pending:
+                if len(text) + len(item) + 30 > MESSAGE_LIMIT or (ticket_id and len(ticket_ids) == TICKETS_PER_DIGEST):
+                    messages.append((text, ticket_ids, items))
+                    text, ticket_ids, items = "", [], []
+                text += f"\n\n{'─' * 20}\n\n{item}" if text else item
+                items.append((item, ticket_id))
+                if ticket_id:
+                    ticket_ids.append(ticket_id)
+            messages.append((text, ticket_ids, items))
+
+        failed = []
+        for text, ticket_ids, items in messages:
+            try:
+                await self._call(self.bot.send_message, self.admin_id, text,
+                                 reply_markup=ticket_keyboard(ticket_ids) if ticket_ids else None)
+            except (TelegramNetworkError, TelegramServerError, TelegramRetryAfter) as e:
+                logging.error(f"Error sending notification digest to admin, will retry: {e}")
+                failed += items
+            except Exception as e:
+                logging.error(f"Error sending notification digest to admin: {e}")
+        return failed
+
+    async def notify_media(self, message: Message, text: str, ticket_id=None):
+        """Copy a photo, video or document message to the admin, captioned with `text` and the sender."""
+        caption = (f"{format_ticket(ticket_id)}{html.escape(truncate(text, CAPTION_LIMIT - 200))}\n\n"
+                   f"{format_sender(message.from_user)}")
+        try:
+            await self._call(self.bot.copy_message, self.admin_id, message.chat.id, message.message_id, caption=caption,
+                             reply_markup=ticket_keyboard([ticket_id]) if ticket_id else None)
+        except Exception as e:
+            logging.error(f"Error copying media to admin: {e}")
+
+    async def notify_media_group(self, messages: List[Message], media: List[tuple], text: str, ticket_id=None):
+        """Resend an album to the admin as one media group; `media` holds (message_type, file_id) pairs.
+
+        Media groups cannot carry buttons, so the ticket is only numbered in the caption.
+        """
+        caption = (f"{format_ticket(ticket_id)}{html.escape(truncate(text, CAPTION_LIMIT - 200))}\n\n"
+                   f"{format_sender(messages[0].from_user)}")
+        group = [
+            INPUT_MEDIA_TYPES[message_type](media=file_id, caption=caption if i == 0 else None)
+            for i, (message_type, file_id) in enumerate(media)
+        ]
+        try:
+            await self._call(self.bot.send_media_group, self.admin_id, group)
+        except Exception as e:
+            logging.error(f"Error sending media group to admin: {e}")
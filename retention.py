@@ -0,0 +1,102 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from database import AsyncDatabase
+
+
+class MessageRetention:
+    """Background pruning of the messages log.
+
+    `rules` maps a message_type to the number of days its rows are kept
+    (None keeps them forever); the "*" entry applies to every type not
+    listed. Expired rows are removed in chunks of chunk_size, each in its
+    own short transaction, so the write lock is never held for long (the
+    analytics rollups counted them when they were logged). With
+    archive_dir set, every chunk is first appended to a gzip-compressed
+    JSONL segment per day. With active_users_days set, the per-user
+    daily_active_users rows of days outside that window are dropped too;
+    daily_stats keeps each day's count. After a pass, up to vacuum_pages
+    freed pages are returned to the filesystem with an incremental vacuum.
+    """
+
+    def __init__(self, db: AsyncDatabase, rules, chunk_size=1000, archive_dir=None, vacuum_pages=1000,
+                 chunk_pause=0.05, active_users_days=None):
+        self.db = db
+        self.rules = rules
+        self.active_users_days = active_users_days
+        self.chunk_size = chunk_size
+        self.archive_dir = archive_dir
+        self.vacuum_pages = vacuum_pages
+        self.chunk_pause = chunk_pause
+
+    def export(self, rows):
+        """Append rows to today's archive segment (gzip members concatenate into one valid file)."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"messages-{datetime.now():%Y%m%d}.jsonl.gz")
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row_id, user_id, message_text, message_type, file_id, timestamp in rows:
+                f.write(json.dumps({
+                    'id': row_id,
+                    'user_id': user_id,
+                    'message_text': message_text,
+                    'message_type': message_type,
+                    'file_id': file_id,
+                    'timestamp': str(timestamp),
+                }, ensure_ascii=False) + "\n")
+
+    async def prune(self, days, message_type=None, exclude_types=()):
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        pruned = 0
+        while True:
+            rows = await self.db.get_expired_messages(cutoff, self.chunk_size, message_type, exclude_types)
+            if not rows:
+                break
+            if self.archive_dir:
+                await asyncio.to_thread(self.export, rows)
+            if not await self.db.archive_messages(rows):
+                break
+            pruned += len(rows)
+            if len(rows) < self.chunk_size:
+                break
+            # Let queued bot writes run between chunks
+            await asyncio.sleep(self.chunk_pause)
+        return pruned
+
+    async def run(self):
+        """One retention pass over all rules. Returns the number of pruned messages."""
+        listed = tuple(message_type for message_type in self.rules if message_type != "*")
+        pruned = 0
+        for message_type in listed:
+            if self.rules[message_type] is not None:
+                pruned += await self.prune(self.rules[message_type], message_type=message_type)
+        if self.rules.get("*") is not None:
+            pruned += await self.prune(self.rules["*"], exclude_types=listed)
+        if pruned:
+            logging.info(f"Retention pass pruned {pruned} messages.")
+        active_pruned = await self.prune_active_users()
+        if pruned or active_pruned:
+            await self.db.incremental_vacuum(self.vacuum_pages)
+        return pruned
+
+    async def prune_active_users(self):
+        """Drop daily_active_users rows older than the dashboard window. Returns the number deleted."""
+        if self.active_users_days is None:
+            return 0
+        # Same window start as Database.get_dashboard; today's rows stay for deduplication
+        since = (datetime.utcnow() - timedelta(days=self.active_users_days - 1)).strftime("%Y-%m-%d")
+        deleted = await self.db.prune_daily_active_users(since) or 0
+        if deleted:
+            logging.info(f"Retention pass pruned {deleted} daily active user rows.")
+        return deleted
+
+    async def run_periodic(self, interval):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logging.error(f"Retention pass failed: {e}")
+            await asyncio.sleep(interval)
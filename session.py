@@ -0,0 +1,50 @@
+from typing import Any, Dict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiohttp import FormData
+
+
+class StaticMarkupSession(AiohttpSession):
+    """AiohttpSession that serialises each static keyboard only once.
+
+    aiogram dumps and JSON-encodes the reply_markup of every request.
+    Keyboards registered here never change, so the first request that
+    uses one stores its JSON and later requests reuse it. Requests with
+    any other markup are serialised as usual.
+    """
+
+    def __init__(self, static_markups=(), **kwargs: Any):
+        super().__init__(**kwargs)
+        # id(markup) -> [markup, cached JSON or None]; holding the markup keeps its id stable
+        self._static_markups = {id(markup): [markup, None] for markup in static_markups}
+
+    def _markup_json(self, bot: Bot, markup: Any):
+        entry = self._static_markups.get(id(markup))
+        if entry is None or entry[0] is not markup:
+            return None
+        if entry[1] is None:
+            entry[1] = self.prepare_value(markup, bot=bot, files={})
+        return entry[1]
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[Any]) -> FormData:
+        markup_json = self._markup_json(bot, getattr(method, "reply_markup", None))
+        if markup_json is None:
+            return super().build_form_data(bot, method)
+
+        form = FormData(quote_fields=False)
+        files: Dict[str, Any] = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", markup_json)
+        for key, value in files.items():
+            form.add_field(
+                key,
+                value.read(bot),
+                filename=value.filename or key,
+            )
+        return form
@@ -15,3 +15,4 @@ class AdminStates(StatesGroup):
     waiting_for_promocode_creation = State()
     waiting_for_user_id_message = State()
     waiting_for_individual_message = State()
+    waiting_for_search_query = State()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from buffers import WriteBehindBuffer
+from database import AsyncDatabase
+
+
+@dataclass
+class CachedRecord:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    accessed_at: float = 0.0
+
+
+class SQLiteStorage(WriteBehindBuffer, BaseStorage):
+    """FSM storage persisted in the fsm_storage table.
+
+    Reads and writes go to an in-memory cache; changed keys are written
+    back in one batch flush_interval seconds later. Records idle for
+    cache_ttl seconds are evicted from memory (the cache is also capped at
+    max_cached entries), and records idle for state_ttl seconds are
+    deleted from the database, so abandoned flows do not live forever.
+    """
+
+    def __init__(self, db: AsyncDatabase, flush_interval=1.0, cache_ttl=600, state_ttl=7 * 24 * 3600,
+                 max_cached=100000):
+        super().__init__(flush_interval)
+        self.db = db
+        self.cache_ttl = cache_ttl
+        self.state_ttl = state_ttl
+        self.max_cached = max_cached
+        self.cache = OrderedDict()
+        self.dirty = set()
+
+    @staticmethod
+    def _storage_key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    async def _get_record(self, key: StorageKey) -> CachedRecord:
+        storage_key = self._storage_key(key)
+        record = self.cache.get(storage_key)
+        if record is None:
+            row = await self.db.get_fsm_record(storage_key)
+            loaded = CachedRecord(row[0], json.loads(row[1]) if row[1] else {}) if row else CachedRecord()
+            # Another task may have loaded (and changed) the key while we awaited
+            record = self.cache.setdefault(storage_key, loaded)
+            if len(self.cache) > self.max_cached:
+                self.trim()
+        else:
+            self.cache.move_to_end(storage_key)
+        record.accessed_at = time.monotonic()
+        return record
+
+    def _mark_dirty(self, key: StorageKey):
+        self.dirty.add(self._storage_key(key))
+        self.schedule()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = data.copy()
+        self._mark_dirty(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._get_record(key)).data.copy()
+
+    def take(self):
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    async def write(self, dirty):
+        now = time.time()
+        records = []
+        for storage_key in dirty:
+            record = self.cache.get(storage_key)
+            if record is not None:
+                records.append((storage_key, record.state, json.dumps(record.data) if record.data else None, now))
+        return None if await self.db.save_fsm_records(records) else dirty
+
+    def restore(self, dirty):
+        self.dirty |= dirty
+
+    def trim(self):
+        """Drop the least recently used clean records while over max_cached.
+
+        The cache is kept in LRU order, so this only pops from the front;
+        unflushed records found there are put back in place.
+        """
+        overflow = len(self.cache) - self.max_cached
+        kept = []
+        while overflow > 0 and self.cache:
+            storage_key, record = self.cache.popitem(last=False)
+            if storage_key in self.dirty:
+                kept.append((storage_key, record))
+            else:
+                overflow -= 1
+        for storage_key, record in reversed(kept):
+            self.cache[storage_key] = record
+            self.cache.move_to_end(storage_key, last=False)
+
+    def evict(self):
+        """Drop idle records from memory, then the oldest ones while over max_cached."""
+        deadline = time.monotonic() - self.cache_ttl
+        for storage_key in [k for k, record in self.cache.items() if record.accessed_at < deadline]:
+            if storage_key not in self.dirty:
+                del self.cache[storage_key]
+        self.trim()
+
+    async def run_periodic_eviction(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+            self.evict()
+            deleted = await self.db.delete_expired_fsm_records(time.time() - self.state_ttl)
+            if deleted:
+                logging.info(f"Deleted {deleted} expired FSM records.")
+
+    async def close(self) -> None:
+        await super().close()
@@ -0,0 +1,42 @@
+from typing import Any, Dict, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.types import Message
+
+
+class TextCommandRouter(Router):
+    """Router dispatching exact message texts (keyboard buttons) with one dict lookup.
+
+    Handlers are registered with `@text_commands.text("Button 🔘", ...)`
+    instead of one `@router.message(F.text == ...)` filter each. The
+    router itself has a single message handler whose filter looks the
+    text up in the table, so resolving a button press costs the same
+    whether it is the first or the thirtieth button, and texts that are
+    not buttons fall through after one lookup. Handlers receive the same
+    injected arguments (state, bot, ...) as regular aiogram handlers.
+    """
+
+    def __init__(self, name=None):
+        super().__init__(name=name)
+        self.handlers = {}
+        self.message.register(self._dispatch, self._lookup)
+
+    def text(self, *texts):
+        """Decorator registering a handler for one or more exact texts."""
+        def decorator(handler):
+            callable_object = CallableObject(handler)
+            for text in texts:
+                if text in self.handlers:
+                    raise ValueError(f"Text command already registered: {text!r}")
+                self.handlers[text] = callable_object
+            return handler
+        return decorator
+
+    def _lookup(self, message: Message) -> Union[bool, Dict[str, Any]]:
+        handler = self.handlers.get(message.text)
+        return {"text_command": handler} if handler is not None else False
+
+    @staticmethod
+    async def _dispatch(message: Message, text_command: CallableObject, **kwargs: Any) -> Any:
+        return await text_command.call(message, **kwargs)
@@ -0,0 +1,94 @@
+import asyncio
+import itertools
+from typing import List
+
+from aiogram import Bot
+from aiogram.types import Message, User
+
+from database import AsyncDatabase
+from notifier import AdminNotifier, truncate
+
+TICKET_STRATEGIES = ("least_loaded", "round_robin")
+
+
+class TicketDispatcher:
+    """Spreads incoming user items over several admins as tickets.
+
+    Every item notified to the admins (feedback, complaints, questions,
+    media, ...) gets a row in the tickets table owned by one admin, chosen
+    round-robin or as the admin with the fewest unclosed tickets. Each
+    admin has their own AdminNotifier, so digests and flood limits are
+    per chat. Any admin can claim an open ticket and its owner can close
+    it; both are a single update by primary key. Unclosed ticket counts
+    are kept in memory for least-loaded assignment.
+    """
+
+    def __init__(self, bot: Bot, db: AsyncDatabase, admin_ids, strategy="least_loaded", digest_interval=2.0):
+        if strategy not in TICKET_STRATEGIES:
+            raise ValueError(f"Unknown ticket assignment strategy: {strategy}")
+        self.db = db
+        self.admin_ids = tuple(admin_ids)
+        self.strategy = strategy
+        self.notifiers = {
+            admin_id: AdminNotifier(bot, admin_id, digest_interval=digest_interval) for admin_id in self.admin_ids
+        }
+        # admin id -> number of open or claimed tickets
+        self.load = dict.fromkeys(self.admin_ids, 0)
+        self._rotation = itertools.cycle(self.admin_ids)
+
+    async def start(self):
+        for admin_id, count in (await self.db.get_ticket_loads()).items():
+            if admin_id in self.load:
+                self.load[admin_id] = count
+
+    def assign(self):
+        if self.strategy == "round_robin":
+            return next(self._rotation)
+        return min(self.admin_ids, key=self.load.__getitem__)
+
+    async def open(self, kind, user_id, summary):
+        """Create a ticket for the next admin. Returns (ticket_id, admin_id); ticket_id is None if the insert failed."""
+        admin_id = self.assign()
+        ticket_id = await self.db.create_ticket(user_id, kind, truncate(summary, 200), admin_id)
+        if ticket_id is not None:
+            self.load[admin_id] += 1
+        return ticket_id, admin_id
+
+    async def submit(self, kind, text: str, user: User):
+        ticket_id, admin_id = await self.open(kind, user.id, text)
+        self.notifiers[admin_id].notify(text, user, ticket_id)
+        return ticket_id
+
+    async def submit_media(self, kind, message: Message, text: str):
+        ticket_id, admin_id = await self.open(kind, message.from_user.id, text)
+        await self.notifiers[admin_id].notify_media(message, text, ticket_id)
+        return ticket_id
+
+    async def submit_media_group(self, messages: List[Message], media: List[tuple], text: str):
+        ticket_id, admin_id = await self.open('album', messages[0].from_user.id, text)
+        await self.notifiers[admin_id].notify_media_group(messages, media, text, ticket_id)
+        return ticket_id
+
+    async def claim_ticket(self, ticket_id, admin_id):
+        """Returns "claimed", "mine" (already theirs), "taken" (claimed by another admin) or "missing"."""
+        row = await self.db.claim_ticket(ticket_id, admin_id)
+        if row is None or row[0] == 'closed':
+            return "missing"
+        status, owner = row
+        if status == 'open':
+            if owner != admin_id:
+                if owner in self.load:
+                    self.load[owner] -= 1
+                self.load[admin_id] += 1
+            return "claimed"
+        return "mine" if owner == admin_id else "taken"
+
+    async def close_ticket(self, ticket_id, admin_id):
+        if not await self.db.close_ticket(ticket_id, admin_id):
+            return False
+        if admin_id in self.load:
+            self.load[admin_id] -= 1
+        return True
+
+    async def close(self):
+        await asyncio.gather(*(notifier.close() for notifier in self.notifiers.values()))